@@ -0,0 +1,188 @@
+import argparse
+import gzip
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import List, Dict, Any, Callable
+
+import orjson
+
+from compression import brotli
+from retrieval import PostIndex
+from snapshot_store import columnar_from_documents
+
+WORDS = [
+    "goal", "match", "training", "family", "holiday", "summer", "launch", "collab",
+    "behind", "scenes", "studio", "tour", "fitness", "recipe", "fashion", "week",
+    "concert", "album", "reel", "giveaway", "thank", "you", "fans", "love", "new",
+]
+HASHTAGS = ["fifa", "ad", "tbt", "ootd", "gym", "music", "travel", "food", "football", "style"]
+QUERIES = [
+    "which posts about training get the most likes",
+    "best performing holiday posts",
+    "how do giveaway collab posts perform",
+    "engagement on music and concert reels",
+]
+
+
+def synthetic_posts(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate scraper-shaped posts with random captions and hashtags"""
+    rng = random.Random(seed)
+    return [
+        {
+            "metadata": {
+                "post_id": f"p{i}",
+                "caption": " ".join(rng.choices(WORDS, k=rng.randint(5, 25))),
+                "hashtags": rng.sample(HASHTAGS, k=rng.randint(0, 4)),
+                "type": rng.choice(["Image", "Reel", "Carousel"]),
+                "likes": rng.randint(0, 1_000_000),
+                "comments": rng.randint(0, 10_000),
+                "views": rng.randint(0, 5_000_000),
+                "timestamp": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                             f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+                "urls": [
+                    f"https://instagram.fdel1-6.fna.fbcdn.net/v/t51.29350-15/{rng.getrandbits(64)}_n.jpg"
+                    f"?stp=dst-jpg_e35&_nc_ohc={rng.getrandbits(48):x}&oh={rng.getrandbits(96):x}"
+                    for _ in range(rng.randint(1, 4))
+                ],
+            }
+        }
+        for i in range(count)
+    ]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def time_call(fn: Callable[[], Any], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def bench_retrieval(sizes: List[int], k: int, repeat: int):
+    """Report index build time and top-k query latency for each corpus size"""
+    print(f"{'posts':>8} {'index':>6} {'build ms':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in sizes:
+        posts = synthetic_posts(size)
+        start = time.perf_counter()
+        index = PostIndex.from_documents(posts)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        timings = []
+        for query in QUERIES:
+            timings += time_call(lambda: index.search(query, k), repeat)
+
+        kind = "brute" if index.centroids is None else "ivf"
+        print(f"{size:>8} {kind:>6} {build_ms:>10.1f} "
+              f"{statistics.median(timings):>8.3f} {percentile(timings, 95):>8.3f}")
+
+
+def bench_serialization(count: int, repeat: int):
+    """Compare encoder CPU time and wire size for a getData-sized response"""
+    posts = [{"_id": f"{i:032x}", **post} for i, post in enumerate(synthetic_posts(count))]
+    projected = [
+        {"_id": post["_id"], "metadata": {key: post["metadata"][key]
+                                          for key in ("likes", "comments", "views", "timestamp", "type")}}
+        for post in posts
+    ]
+
+    columnar = columnar_from_documents(posts)
+
+    print(f"{'payload':>10} {'encoder':>8} {'encode ms':>10} {'raw KB':>8} {'gzip KB':>8} {'br KB':>8}")
+    for label, payload in (("full", posts), ("projected", projected), ("columnar", columnar)):
+        for encoder_name, encode in (("json", lambda p: json.dumps(p).encode("utf-8")), ("orjson", orjson.dumps)):
+            encode_ms = statistics.median(time_call(lambda: encode(payload), repeat))
+            body = encode(payload)
+            gzip_kb = len(gzip.compress(body, compresslevel=6)) / 1024
+            br_kb = len(brotli.compress(body, quality=4)) / 1024 if brotli else float("nan")
+            print(f"{label:>10} {encoder_name:>8} {encode_ms:>10.2f} {len(body) / 1024:>8.1f} "
+                  f"{gzip_kb:>8.1f} {br_kb:>8.1f}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_startup(repeat: int, path: str, timeout: float):
+    """Measure `import main` time and time from process launch to first successful request"""
+    import_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import main"], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        import_times.append((time.perf_counter() - start) * 1000)
+
+    first_request_times = []
+    for _ in range(repeat):
+        port = _free_port()
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=os.environ.copy()
+        )
+        try:
+            while time.perf_counter() - start < timeout:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                        if response.status == 200:
+                            first_request_times.append((time.perf_counter() - start) * 1000)
+                            break
+                except (urllib.error.URLError, ConnectionError, OSError):
+                    time.sleep(0.01)
+            else:
+                print(f"No successful response from {path} within {timeout}s")
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{'metric':>22} {'p50 ms':>8} {'max ms':>8}")
+    print(f"{'python -c import main':>22} {statistics.median(import_times):>8.0f} {max(import_times):>8.0f}")
+    if first_request_times:
+        print(f"{'first request':>22} {statistics.median(first_request_times):>8.0f} "
+              f"{max(first_request_times):>8.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend performance benchmarks")
+    subparsers = parser.add_subparsers(dest="suite", required=True)
+
+    retrieval_parser = subparsers.add_parser("retrieval", help="Top-k post retrieval latency")
+    retrieval_parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    retrieval_parser.add_argument("--k", type=int, default=30)
+    retrieval_parser.add_argument("--repeat", type=int, default=50)
+
+    serialization_parser = subparsers.add_parser("serialization", help="getData response encoding and size")
+    serialization_parser.add_argument("--count", type=int, default=1000)
+    serialization_parser.add_argument("--repeat", type=int, default=20)
+
+    startup_parser = subparsers.add_parser("startup", help="Import time and time to first request")
+    startup_parser.add_argument("--repeat", type=int, default=5)
+    startup_parser.add_argument("--path", default="/api/v1/health/live")
+    startup_parser.add_argument("--timeout", type=float, default=60)
+
+    args = parser.parse_args()
+    if args.suite == "retrieval":
+        bench_retrieval(args.sizes, args.k, args.repeat)
+    elif args.suite == "serialization":
+        bench_serialization(args.count, args.repeat)
+    elif args.suite == "startup":
+        bench_startup(args.repeat, args.path, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
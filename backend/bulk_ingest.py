@@ -0,0 +1,266 @@
+import argparse
+import codecs
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from ingest import prepare_documents, upsert_documents
+
+DEFAULT_INPUT = "./sample_data/all_influencers_data.json"
+COLLECTION_NAME = "instagram"
+READ_SIZE = 1 << 20
+WHITESPACE = re.compile(r"\s*")
+
+
+def iter_json_array(f: BinaryIO, read_size: int = READ_SIZE) -> Iterator[Tuple[Any, int]]:
+    """
+    Yield the elements of a top-level JSON array one at a time, with the bytes read so far.
+
+    The file is read in blocks and each element is decoded with
+    ``JSONDecoder.raw_decode`` as soon as it is complete, so memory use is
+    bounded by the block size and the largest element, not the file size.
+
+    Raises:
+        ValueError: If the file is not a JSON array or is truncated
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, bytes_read, eof = "", 0, 0, False
+    state = "start"
+
+    while True:
+        pos = WHITESPACE.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of file inside the JSON array")
+            block = f.read(read_size)
+            bytes_read += len(block)
+            eof = not block
+            buffer = buffer[pos:] + utf8.decode(block, final=eof)
+            pos = 0
+            continue
+
+        char = buffer[pos]
+        if state == "start":
+            if char != "[":
+                raise ValueError("Input is not a JSON array")
+            pos += 1
+            state = "first"
+        elif state == "separator":
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' after element, found {char!r}")
+            pos += 1
+            state = "element"
+        else:
+            if char == "]" and state == "first":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # A number cut at the block boundary decodes as a shorter number, so
+                # an element only counts once the separator after it has been read
+                following = WHITESPACE.match(buffer, end).end()
+                complete = eof or (following < len(buffer) and buffer[following] in ",]")
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                block = f.read(read_size)
+                bytes_read += len(block)
+                eof = not block
+                buffer = buffer[pos:] + utf8.decode(block, final=eof)
+                pos = 0
+                continue
+            pos = end
+            state = "separator"
+            yield item, bytes_read
+
+
+class IngestProgress:
+    """
+    Number of leading posts of the input that are safely stored, persisted so
+    an interrupted run resumes after them.
+
+    Chunks finish out of order; only the contiguous prefix of finished chunks
+    counts as committed. Chunks past it may be sent again on resume, which
+    is harmless because documents are upserted by deterministic ``_id``.
+    """
+
+    def __init__(self, path: Optional[str], source: str, committed: int = 0):
+        self.path = path
+        self.source = source
+        self.committed = committed
+        self._finished: Dict[int, int] = {}
+
+    @classmethod
+    def load(cls, path: str, source: str) -> "IngestProgress":
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return cls(path, source)
+        if state.get("source") != os.path.abspath(source):
+            raise ValueError(f"{path} records progress for {state.get('source')}, not {source}")
+        return cls(path, source, state.get("committed", 0))
+
+    def finish(self, start: int, end: int):
+        """Record that posts [start, end) are stored, advancing the committed prefix if possible"""
+        self._finished[start] = end
+        advanced = False
+        while self.committed in self._finished:
+            self.committed = self._finished.pop(self.committed)
+            advanced = True
+        if advanced:
+            self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        payload = {"source": os.path.abspath(self.source), "committed": self.committed, "updated_at": time.time()}
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.path)
+
+
+def upload_chunk(collection, posts: List[Dict[str, Any]], retries: int) -> Tuple[int, int]:
+    """Normalize one chunk like the API does and upsert it, retrying with backoff"""
+    documents = prepare_documents(posts)
+    if collection is None:
+        return len(documents), 0
+    for attempt in range(retries + 1):
+        try:
+            return upsert_documents(collection, documents, concurrency=1)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = 2 ** attempt
+            print(f"Chunk upload failed ({e}), retrying in {delay}s", file=sys.stderr)
+            time.sleep(delay)
+
+
+def get_collection(name: str):
+    """Connect to the AstraDB collection using the API's environment variables"""
+    from astrapy import DataAPIClient
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    client = DataAPIClient(os.getenv("ASTRADB_TOKEN"))
+    database = client.get_database_by_api_endpoint(os.getenv("DATASTAX_API_ENDPOINT"))
+    return database.get_collection(name)
+
+
+def run_ingest(args, collection) -> bool:
+    """Stream the input into ``collection``; returns False if a chunk failed"""
+    # Dry runs store nothing, so they neither resume nor record progress
+    progress_path = None if collection is None else args.progress or f"{args.input}.progress.json"
+    if progress_path is None or args.restart:
+        progress = IngestProgress(progress_path, args.input)
+    else:
+        progress = IngestProgress.load(progress_path, args.input)
+    skip = progress.committed
+    if skip:
+        print(f"Resuming after {skip:,} posts already ingested")
+
+    total_bytes = os.path.getsize(args.input)
+    stats = {"read": 0, "inserted": 0, "replaced": 0}
+    accounts: Set[str] = set()
+    failure: Optional[BaseException] = None
+    started = last_report = time.monotonic()
+    bytes_read = 0
+
+    def report(final: bool = False):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        stored = stats["inserted"] + stats["replaced"]
+        print(
+            f"{'Done: ' if final else ''}{stored:,} posts {'normalized' if collection is None else 'stored'} "
+            f"({stored / elapsed:,.0f}/s), "
+            f"{stats['inserted']:,} inserted, {stats['replaced']:,} replaced, {len(accounts):,} accounts, "
+            f"{bytes_read / max(total_bytes, 1):.0%} of input read, {elapsed:.1f}s"
+        )
+
+    def collect(done: Set[Future]):
+        nonlocal failure
+        for future in done:
+            start, end = in_flight.pop(future)
+            try:
+                inserted, replaced = future.result()
+            except Exception as e:
+                failure = failure or e
+                print(f"Chunk of posts {start:,}-{end - 1:,} failed: {e}", file=sys.stderr)
+                continue
+            stats["inserted"] += inserted
+            stats["replaced"] += replaced
+            progress.finish(start, end)
+
+    in_flight: Dict[Future, Tuple[int, int]] = {}
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        def submit(start: int, chunk: List[Dict[str, Any]]):
+            # Bound the chunks held in memory to two per worker
+            while len(in_flight) >= 2 * args.concurrency:
+                collect(wait(in_flight, return_when=FIRST_COMPLETED)[0])
+            future = executor.submit(upload_chunk, collection, chunk, args.retries)
+            in_flight[future] = (start, start + len(chunk))
+
+        chunk: List[Dict[str, Any]] = []
+        chunk_start = skip
+        try:
+            with open(args.input, "rb") as f:
+                for index, (post, bytes_read) in enumerate(iter_json_array(f)):
+                    if index < skip:
+                        continue
+                    if failure is not None or (args.limit is not None and stats["read"] >= args.limit):
+                        break
+                    stats["read"] += 1
+                    accounts.add(post.get("username") or post.get("metadata", {}).get("username", ""))
+                    chunk.append(post)
+                    if len(chunk) == args.chunk_size:
+                        submit(chunk_start, chunk)
+                        chunk_start += len(chunk)
+                        chunk = []
+                    if time.monotonic() - last_report >= args.report_interval:
+                        last_report = time.monotonic()
+                        report()
+            if chunk and failure is None:
+                submit(chunk_start, chunk)
+        except KeyboardInterrupt:
+            print("Interrupted; waiting for chunks in flight", file=sys.stderr)
+            failure = failure or KeyboardInterrupt()
+        while in_flight:
+            collect(wait(in_flight, return_when=FIRST_COMPLETED)[0])
+
+    report(final=True)
+    if progress_path is not None:
+        print(f"{progress.committed:,} posts committed; progress saved to {progress_path}")
+    return failure is None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream insta_fetch crawl output into the AstraDB collection, resumably"
+    )
+    parser.add_argument("input", nargs="?", default=DEFAULT_INPUT, help="JSON array of scraped posts")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--chunk-size", type=int, default=200, help="Posts normalized and upserted per task")
+    parser.add_argument("--concurrency", type=int, default=8, help="Chunks uploaded in parallel")
+    parser.add_argument("--retries", type=int, default=3, help="Attempts per chunk after the first")
+    parser.add_argument("--progress", help="Progress file (default: <input>.progress.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress and start from the first post")
+    parser.add_argument("--limit", type=int, help="Stop after this many posts")
+    parser.add_argument("--report-interval", type=float, default=5, help="Seconds between throughput reports")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and normalize without writing to AstraDB")
+    args = parser.parse_args()
+
+    collection = None if args.dry_run else get_collection(args.collection)
+    if not run_ingest(args, collection):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
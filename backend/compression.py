@@ -0,0 +1,140 @@
+import asyncio
+import gzip
+import re
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Media types worth compressing; images, video and archives are already compressed
+COMPRESSIBLE_TYPES = frozenset({"application/json", "application/javascript", "application/xml", "image/svg+xml"})
+# Encoding suffix added to ETags of compressed responses, stripped again from If-None-Match
+ETAG_SUFFIX = re.compile(r'-(br|gzip)"')
+
+
+def is_compressible(content_type: str) -> bool:
+    """Whether a response of ``content_type`` is text-like and worth compressing"""
+    media_type = content_type.partition(";")[0].strip().lower()
+    return (media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+            or media_type.endswith("+json") or media_type.endswith("+xml"))
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported content coding from an Accept-Encoding header.
+
+    Brotli is preferred over gzip when both are acceptable and the brotli
+    module is installed. Codings with ``q=0`` are treated as refused.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    wildcard = accepted.get("*", 0.0)
+    scored = [(accepted.get(name, wildcard), name) for name in candidates]
+    scored = [(quality, name) for quality, name in scored if quality > 0]
+    if not scored:
+        return None
+    best = max(quality for quality, _ in scored)
+    return next(name for quality, name in scored if quality == best)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing large single-chunk responses with brotli or gzip.
+
+    Only text-like media types are compressed, and a body the encoding does
+    not shrink is sent as is. Streaming responses (more than one body chunk)
+    and responses that already carry a Content-Encoding pass through
+    untouched. A compressed response's ETag gets an encoding suffix, so it
+    differs from the identity response's; the suffix is removed from
+    If-None-Match before the request reaches the app. Bodies of at least
+    ``thread_size`` bytes, which take a millisecond or more to compress, are
+    compressed in a worker thread so they do not hold up the event loop.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, thread_size: int = 64 * 1024,
+                 gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_size = thread_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = request_headers.get("if-none-match")
+        suffixed = ETAG_SUFFIX.search(if_none_match) if if_none_match else None
+        if suffixed:
+            scope = dict(scope)
+            scope["headers"] = [(name, value) for name, value in scope["headers"] if name != b"if-none-match"]
+            scope["headers"].append((b"if-none-match", ETAG_SUFFIX.sub('"', if_none_match).encode("latin-1")))
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            # A 304 for a compressed representation must repeat the ETag the client holds
+            if start_message["status"] == 304 and suffixed and headers.get("etag", "").endswith('"'):
+                headers["ETag"] = f'{headers["etag"][:-1]}-{suffixed.group(1)}"'
+            compressed = None
+            if (not message.get("more_body", False) and len(body) >= self.minimum_size
+                    and "content-encoding" not in headers and is_compressible(headers.get("content-type", ""))):
+                if len(body) >= self.thread_size:
+                    compressed = await asyncio.to_thread(self.compress, body, encoding)
+                else:
+                    compressed = self.compress(body, encoding)
+            if compressed is None or len(compressed) >= len(body):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
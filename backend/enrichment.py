@@ -0,0 +1,112 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger("instagram-api")
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Below this many posts the cost of spawning worker processes and pickling the
+# batch outweighs the work itself, so enrichment runs inline instead.
+PARALLEL_THRESHOLD = 500
+DEFAULT_CHUNK_SIZE = 100
+
+DERIVED_FIELDS = (
+    "engagement_total",
+    "engagement_rate",
+    "post_hour",
+    "post_weekday",
+    "hashtag_count",
+    "caption_length",
+    "media_count",
+)
+
+
+def parse_timestamp(timestamp: Optional[str]) -> Optional[datetime]:
+    """Parse a scraper timestamp, returning None when it is missing or malformed"""
+    if not timestamp:
+        return None
+    try:
+        return datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def timestamp_to_epoch(timestamp: Optional[str]) -> int:
+    """Convert a scraper timestamp (UTC) to epoch seconds, or 0 if it is unusable"""
+    posted_at = parse_timestamp(timestamp)
+    return int(posted_at.replace(tzinfo=timezone.utc).timestamp()) if posted_at else 0
+
+
+def compute_derived_features(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute the derived values every consumer needs from a post's raw metadata.
+
+    Engagement rate is engagement per view and is only defined for posts that
+    report views (reels); it is 0.0 otherwise.
+
+    Args:
+        metadata: The raw ``metadata`` block produced by the scraper
+
+    Returns:
+        dict: Derived feature values keyed by the names in DERIVED_FIELDS
+    """
+    likes = metadata.get("likes") or 0
+    comments = metadata.get("comments") or 0
+    views = metadata.get("views") or 0
+    engagement_total = likes + comments
+    posted_at = parse_timestamp(metadata.get("timestamp"))
+
+    return {
+        "engagement_total": engagement_total,
+        "engagement_rate": round(engagement_total / views, 6) if views else 0.0,
+        "post_hour": posted_at.hour if posted_at else None,
+        "post_weekday": posted_at.weekday() if posted_at else None,
+        "hashtag_count": len(metadata.get("hashtags") or []),
+        "caption_length": len((metadata.get("caption") or "").strip()),
+        "media_count": len(metadata.get("urls") or []),
+    }
+
+
+def _compute_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Worker entry point: compute derived features for a chunk of metadata blocks"""
+    return [compute_derived_features(metadata) for metadata in chunk]
+
+
+def enrich_posts(posts: List[Dict[str, Any]], max_workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Dict[str, Any]]:
+    """
+    Attach derived features to each post under ``metadata.derived``.
+
+    Large batches are split into chunks and computed in a process pool; small
+    batches are computed inline. Posts are modified in place and returned.
+
+    Args:
+        posts: Scraped post documents
+        max_workers: Process pool size (defaults to the CPU count)
+        chunk_size: Number of posts handed to a worker at a time
+
+    Returns:
+        list: The same posts, enriched
+    """
+    metadata_blocks = [post.setdefault("metadata", {}) for post in posts]
+
+    if len(posts) < PARALLEL_THRESHOLD:
+        derived = _compute_chunk(metadata_blocks)
+    else:
+        chunks = [metadata_blocks[i:i + chunk_size] for i in range(0, len(metadata_blocks), chunk_size)]
+        derived = []
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                for result in executor.map(_compute_chunk, chunks):
+                    derived.extend(result)
+        except Exception as e:
+            logger.warning(f"Process pool enrichment failed, computing inline: {str(e)}")
+            derived = _compute_chunk(metadata_blocks)
+
+    for metadata, features in zip(metadata_blocks, derived):
+        metadata["derived"] = features
+
+    logger.info(f"Enriched {len(posts)} posts with derived features")
+    return posts
@@ -0,0 +1,124 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from timing import record_phase
+
+logger = logging.getLogger("instagram-api")
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when a workload executor's queue is full and the call is shed"""
+    pass
+
+
+class BoundedExecutor:
+    """
+    Thread pool for one workload class with a bounded wait queue.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` wait
+    for a thread; anything beyond that is rejected immediately with
+    ExecutorSaturatedError instead of piling up behind slow work. Calls run
+    in a copy of the caller's context, like ``asyncio.to_thread``, and their
+    queue wait and run time are recorded as phases of the current request.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn`` on this executor, shedding the call if the queue is full"""
+        with self._lock:
+            if self.active + self.queued >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError(f"{self.name} executor is saturated")
+            self.queued += 1
+
+        submitted_at = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def call():
+            wait_ms = (time.perf_counter() - submitted_at) * 1000
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait_ms += wait_ms
+            started_at = time.perf_counter()
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                context.run(record_phase, f"{self.name}-queue", wait_ms)
+                context.run(record_phase, self.name, (time.perf_counter() - started_at) * 1000)
+
+        def release_if_cancelled(future):
+            # A call cancelled while still queued never runs, so its slot is released here
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+
+        try:
+            future = self._executor.submit(call)
+        except RuntimeError:
+            with self._lock:
+                self.queued -= 1
+            raise
+        future.add_done_callback(release_if_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def is_idle(self) -> bool:
+        """True when nothing is running or waiting on this executor"""
+        with self._lock:
+            return self.active == 0 and self.queued == 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth and counters, for monitoring"""
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait_ms / started, 2) if started else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class WorkloadExecutors:
+    """The set of per-workload executors used by the API"""
+
+    def __init__(self, sizes: Dict[str, tuple]):
+        self.executors = {
+            name: BoundedExecutor(name, max_workers, max_queue)
+            for name, (max_workers, max_queue) in sizes.items()
+        }
+
+    def __getitem__(self, name: str) -> BoundedExecutor:
+        return self.executors[name]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: executor.stats() for name, executor in self.executors.items()}
+
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown()
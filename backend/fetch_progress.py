@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger("instagram-api")
+
+
+class FetchProgressHub:
+    """
+    Per-username fan-out of cold-fetch events to streaming clients.
+
+    The fetch publishes events from the event loop with ``publish`` or from
+    scraper threads with ``publish_threadsafe``; every subscriber of that
+    username receives them on its own asyncio queue. Events of a fetch still
+    running are kept, so a client that subscribes midway first receives
+    everything it missed. Events only reach subscribers in this process.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._history: Dict[str, List[Dict[str, Any]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def begin(self, username: str):
+        """Start recording events for a fetch of ``username``; call from the event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._history[username] = []
+
+    def end(self, username: str):
+        """Forget the events of a finished fetch"""
+        self._history.pop(username, None)
+
+    def subscribe(self, username: str) -> asyncio.Queue:
+        """Queue receiving ``username``'s events, starting with those already published"""
+        queue = asyncio.Queue()
+        for event in self._history.get(username, ()):
+            queue.put_nowait(event)
+        self._subscribers[username].add(queue)
+        return queue
+
+    def unsubscribe(self, username: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(username)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[username]
+
+    def publish(self, username: str, event: Dict[str, Any]):
+        """Send an event to every subscriber of ``username``; call from the event loop"""
+        history = self._history.get(username)
+        if history is not None:
+            history.append(event)
+        for queue in self._subscribers.get(username, ()):
+            queue.put_nowait(event)
+
+    def publish_threadsafe(self, username: str, event: Dict[str, Any]):
+        """``publish`` from a thread other than the event loop's"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self.publish, username, event)
@@ -0,0 +1,175 @@
+import logging
+import os
+import sqlite3
+import statistics
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("instagram-api")
+
+ANALYTICS_PATH = "./live_data/analytics.sqlite3"
+# Scope of the cross-user aggregates in hashtag_stats
+GLOBAL_SCOPE = ""
+SORT_COLUMNS = {
+    "count": "post_count",
+    "likes": "CAST(likes_sum AS REAL) / post_count",
+    "comments": "CAST(comments_sum AS REAL) / post_count",
+}
+
+
+class HashtagIndex:
+    """
+    Inverted index from hashtag to posts, with running engagement aggregates.
+
+    ``hashtag_posts`` maps (username, hashtag) to post ids along with each
+    post's likes and comments; ``hashtag_stats`` keeps post count and like and
+    comment sums per hashtag, once per user and once across all users. Both
+    are updated in the same transaction as posts are indexed, replacing the
+    previous contribution of re-scraped posts, so lookups never scan posts.
+    Medians are computed on demand for the hashtags being returned only.
+    """
+
+    def __init__(self, path: str = ANALYTICS_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashtag_posts ("
+            "username TEXT NOT NULL, hashtag TEXT NOT NULL, post_id TEXT NOT NULL, "
+            "likes INTEGER NOT NULL, comments INTEGER NOT NULL, "
+            "PRIMARY KEY (username, hashtag, post_id))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS hashtag_posts_by_post ON hashtag_posts (username, post_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS hashtag_posts_by_hashtag ON hashtag_posts (hashtag)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashtag_stats ("
+            "scope TEXT NOT NULL, hashtag TEXT NOT NULL, post_count INTEGER NOT NULL, "
+            "likes_sum INTEGER NOT NULL, comments_sum INTEGER NOT NULL, "
+            "PRIMARY KEY (scope, hashtag))"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _add_stats(conn: sqlite3.Connection, username: str, hashtag: str,
+                   count: int, likes: int, comments: int):
+        for scope in (username, GLOBAL_SCOPE):
+            conn.execute(
+                "INSERT INTO hashtag_stats (scope, hashtag, post_count, likes_sum, comments_sum) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (scope, hashtag) DO UPDATE SET "
+                "post_count = post_count + excluded.post_count, "
+                "likes_sum = likes_sum + excluded.likes_sum, "
+                "comments_sum = comments_sum + excluded.comments_sum",
+                (scope, hashtag, count, likes, comments)
+            )
+
+    def index_posts(self, username: str, docs: List[Dict[str, Any]]) -> int:
+        """
+        Add posts to the index, replacing earlier versions of the same posts.
+
+        Args:
+            username: Account the posts belong to
+            docs: Documents with a ``metadata`` block as stored in AstraDB
+
+        Returns:
+            int: Number of (hashtag, post) entries written
+        """
+        conn = self._connect()
+        written = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for doc in docs:
+                metadata = doc.get("metadata", {})
+                post_id = metadata.get("post_id")
+                if not post_id:
+                    continue
+                previous = conn.execute(
+                    "SELECT hashtag, likes, comments FROM hashtag_posts WHERE username = ? AND post_id = ?",
+                    (username, post_id)
+                ).fetchall()
+                for hashtag, likes, comments in previous:
+                    self._add_stats(conn, username, hashtag, -1, -likes, -comments)
+                conn.execute("DELETE FROM hashtag_posts WHERE username = ? AND post_id = ?", (username, post_id))
+
+                likes = int(metadata.get("likes") or 0)
+                comments = int(metadata.get("comments") or 0)
+                for hashtag in set(metadata.get("hashtags") or []):
+                    if not hashtag:
+                        continue
+                    conn.execute(
+                        "INSERT INTO hashtag_posts (username, hashtag, post_id, likes, comments) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (username, hashtag, post_id, likes, comments)
+                    )
+                    self._add_stats(conn, username, hashtag, 1, likes, comments)
+                    written += 1
+            conn.execute("DELETE FROM hashtag_stats WHERE post_count <= 0")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return written
+
+    def top(self, username: Optional[str] = None, k: int = 20, prefix: Optional[str] = None,
+            sort: str = "count", min_posts: int = 1, include_posts: bool = False) -> List[Dict[str, Any]]:
+        """
+        Top hashtags with their engagement statistics.
+
+        Args:
+            username: Restrict to one account; None aggregates across all accounts
+            k: Number of hashtags to return
+            prefix: Only hashtags starting with this string
+            sort: "count", "likes" (mean likes) or "comments" (mean comments)
+            min_posts: Ignore hashtags used on fewer posts than this
+            include_posts: Also return the ids of the posts using each hashtag
+
+        Returns:
+            list: One dict per hashtag with post_count, mean/median likes and comments
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort: {sort}")
+        scope = username if username is not None else GLOBAL_SCOPE
+        sql = "SELECT hashtag, post_count, likes_sum, comments_sum FROM hashtag_stats WHERE scope = ? AND post_count >= ?"
+        params: List[Any] = [scope, min_posts]
+        if prefix:
+            # Range scan on the (scope, hashtag) primary key
+            sql += " AND hashtag >= ? AND hashtag < ?"
+            params += [prefix, prefix + "\uffff"]
+        sql += f" ORDER BY {SORT_COLUMNS[sort]} DESC, hashtag LIMIT ?"
+        params.append(k)
+
+        conn = self._connect()
+        results = []
+        for hashtag, count, likes_sum, comments_sum in conn.execute(sql, params).fetchall():
+            if username is not None:
+                rows = conn.execute(
+                    "SELECT post_id, likes, comments FROM hashtag_posts WHERE username = ? AND hashtag = ?",
+                    (username, hashtag)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT post_id, likes, comments FROM hashtag_posts WHERE hashtag = ?", (hashtag,)
+                ).fetchall()
+            entry = {
+                "hashtag": hashtag,
+                "post_count": count,
+                "mean_likes": round(likes_sum / count, 2),
+                "median_likes": statistics.median(row[1] for row in rows) if rows else 0,
+                "mean_comments": round(comments_sum / count, 2),
+                "median_comments": statistics.median(row[2] for row in rows) if rows else 0,
+            }
+            if include_posts:
+                entry["post_ids"] = [row[0] for row in rows]
+            results.append(entry)
+        return results
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("instagram-api")
+
+
+@dataclass
+class DependencyStatus:
+    """Result of the most recent probe of one upstream dependency"""
+    name: str
+    healthy: bool
+    latency_ms: float
+    checked_at: str
+    error: Optional[str] = None
+
+
+class HealthProber:
+    """
+    Background prober that checks upstream dependencies on a schedule.
+
+    Health endpoints read the cached results, so probe traffic from uptime
+    monitors never turns into upstream load. Dependencies not listed in
+    ``required`` only degrade readiness instead of failing it.
+    """
+
+    def __init__(self, checks: Dict[str, Callable[[], Awaitable[None]]],
+                 required: tuple = (), interval: float = 30.0, timeout: float = 5.0):
+        self.checks = checks
+        self.required = required
+        self.interval = interval
+        self.timeout = timeout
+        self.statuses: Dict[str, DependencyStatus] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _probe(self, name: str, check: Callable[[], Awaitable[None]]) -> DependencyStatus:
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(check(), self.timeout)
+        except asyncio.TimeoutError:
+            error = f"Timed out after {self.timeout:.1f}s"
+        except Exception as e:
+            error = str(e)
+        latency_ms = (time.perf_counter() - start) * 1000
+        if error:
+            logger.warning(f"Health probe for {name} failed: {error}")
+        return DependencyStatus(name, error is None, round(latency_ms, 1), datetime.now().isoformat(), error)
+
+    async def probe_once(self):
+        """Probe every dependency concurrently and cache the results"""
+        results = await asyncio.gather(*(self._probe(name, check) for name, check in self.checks.items()))
+        self.statuses = {status.name: status for status in results}
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.error(f"Health prober iteration failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start probing in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background probe loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def readiness(self) -> Dict:
+        """
+        Summarize the cached probe results.
+
+        Returns:
+            dict: ``status`` is "ready" when every dependency is healthy,
+            "degraded" when only optional ones are failing, and "unavailable"
+            when a required dependency is failing or has not been probed yet
+        """
+        if not self.statuses:
+            status = "unavailable"
+        elif any(not self.statuses[name].healthy for name in self.required if name in self.statuses):
+            status = "unavailable"
+        elif all(s.healthy for s in self.statuses.values()):
+            status = "ready"
+        else:
+            status = "degraded"
+        return {
+            "status": status,
+            "dependencies": {name: asdict(s) for name, s in self.statuses.items()},
+            "timestamp": datetime.now().isoformat()
+        }
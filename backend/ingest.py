@@ -0,0 +1,64 @@
+import logging
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from enrichment import enrich_posts
+
+logger = logging.getLogger("instagram-api")
+
+# Namespace of the deterministic document ids; changing it would duplicate every stored post
+DOCUMENT_NAMESPACE = uuid.UUID("d7a64419-3631-4076-96a6-ddd1b6444387")
+
+
+def document_id(username: str, post_id: str) -> str:
+    """Stable ``_id`` of a post's document, so ingesting the same post again replaces it"""
+    return uuid.uuid5(DOCUMENT_NAMESPACE, f"{username.lower()}/{post_id}").hex
+
+
+def prepare_documents(posts: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Turn scraped posts into AstraDB documents.
+
+    Derived features are attached under ``metadata.derived``, the username
+    becomes the ``$vectorize`` text and each post gets a deterministic
+    ``_id`` (a random one if it has no post id). Posts are modified in place
+    and returned.
+
+    Args:
+        posts: Posts as written by the scrapers
+        max_workers: Process pool size for enrichment, see enrich_posts
+    """
+    documents = enrich_posts(posts, max_workers)
+    for doc in documents:
+        metadata = doc["metadata"]
+        username = doc.pop("username", None) or metadata.get("username") or ""
+        doc["$vectorize"] = username
+        post_id = metadata.get("post_id")
+        doc["_id"] = document_id(username, post_id) if post_id else uuid.uuid4().hex
+    return documents
+
+
+def upsert_documents(collection, documents: List[Dict[str, Any]], chunk_size: Optional[int] = None,
+                     concurrency: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Insert ``documents`` into ``collection``, replacing any that already exist.
+
+    Everything goes through one unordered insert_many first; the documents
+    it rejects (normally because their ``_id`` is already stored) are then
+    replaced one by one, so the common all-new case costs no extra requests.
+
+    Returns:
+        tuple: Number of documents inserted and number replaced
+    """
+    from astrapy.exceptions import CollectionInsertManyException
+
+    try:
+        collection.insert_many(documents, ordered=False, chunk_size=chunk_size, concurrency=concurrency)
+        return len(documents), 0
+    except CollectionInsertManyException as e:
+        inserted = set(e.inserted_ids)
+
+    rejected = [doc for doc in documents if doc["_id"] not in inserted]
+    for doc in rejected:
+        collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+    return len(inserted), len(rejected)
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+from shared_cache import SharedCache
+
+logger = logging.getLogger("instagram-api")
+
+SCORE_PREFIX = "requests:"
+
+
+class InsightWarmer:
+    """
+    Precomputes standard insights for the most frequently requested accounts.
+
+    Request counts live in the shared cache as decaying scores, so every
+    worker contributes to one ranking. Warming only runs while ``is_idle``
+    reports spare capacity, and goes through ``get_or_compute`` so at most one
+    worker on the node computes a given answer. Each pass of the loop also
+    purges expired entries and leases from the shared cache.
+    """
+
+    def __init__(self, cache: SharedCache, compute: Callable[[str, str], Awaitable[Any]],
+                 cache_key: Callable[[str, str], str], queries: List[str],
+                 is_idle: Callable[[], bool], top_n: int = 20, ttl: Optional[float] = None,
+                 interval: float = 300.0, half_life: float = 24 * 3600.0, idle_poll: float = 1.0):
+        self.cache = cache
+        self.compute = compute
+        self.cache_key = cache_key
+        self.queries = queries
+        self.is_idle = is_idle
+        self.top_n = top_n
+        self.ttl = ttl
+        self.interval = interval
+        self.half_life = half_life
+        self.idle_poll = idle_poll
+        self._pending: Set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def record_request(self, username: str):
+        """Count one request for ``username``; blocking, run it off the event loop"""
+        self.cache.increment_score(f"{SCORE_PREFIX}{username}", self.half_life)
+
+    def top_accounts(self) -> List[str]:
+        """Usernames of the ``top_n`` most requested accounts; blocking"""
+        return [username for username, _ in self.cache.top_scores(SCORE_PREFIX, self.top_n, self.half_life)]
+
+    def notify(self, username: str):
+        """Warm ``username`` soon, if it is one of the top accounts (e.g. after an ingest)"""
+        self._pending.add(username)
+        self._wakeup.set()
+
+    async def _wait_for_idle(self):
+        while not self.is_idle():
+            await asyncio.sleep(self.idle_poll)
+
+    async def warm_account(self, username: str) -> int:
+        """Compute every standard query missing from the cache for ``username``; returns how many were computed"""
+        computed = 0
+        for query in self.queries:
+            key = self.cache_key(username, query)
+            if await asyncio.to_thread(self.cache.get_raw, key) is not None:
+                continue
+            await self._wait_for_idle()
+            try:
+                await self.cache.get_or_compute(key, lambda: self.compute(username, query), ttl=self.ttl)
+                computed += 1
+            except Exception as e:
+                logger.warning(f"Warming '{query}' for {username} failed: {str(e)}")
+        return computed
+
+    async def warm_once(self):
+        """Warm the top accounts, recently ingested ones first"""
+        top = await asyncio.to_thread(self.top_accounts)
+        pending, self._pending = self._pending, set()
+        ordered = [username for username in top if username in pending]
+        ordered += [username for username in top if username not in pending]
+        for username in ordered:
+            computed = await self.warm_account(username)
+            if computed:
+                logger.info(f"Warmed {computed} insights for {username}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.cache.purge_expired)
+            except Exception as e:
+                logger.error(f"Purging the shared cache failed: {str(e)}")
+            try:
+                await self.warm_once()
+            except Exception as e:
+                logger.error(f"Insight warmer iteration failed: {str(e)}")
+
+    def start(self):
+        """Start warming in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background warm loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
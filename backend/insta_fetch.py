@@ -10,9 +10,12 @@ import re
 import threading
 import queue
 from dataclasses import dataclass
-from typing import Set, List, Dict
+from typing import Any, Set, List, Dict
 from math import ceil
 
+from profile_cache import ProfileCache, ProfileUnavailableError
+from shared_cache import SharedCache
+
 # Configure logging and directories
 os.makedirs("./sample_data", exist_ok=True)
 logging.basicConfig(
@@ -25,6 +28,10 @@ logger = logging.getLogger()
 
 BATCH_SIZE = 100
 
+# Shared with the API server, so accounts found missing or private here are
+# skipped there too, and vice versa
+profile_cache = ProfileCache(SharedCache())
+
 @dataclass
 class LoaderPair:
     primary: instaloader.Instaloader
@@ -106,7 +113,8 @@ def write_batch_to_json(batch: List[Dict], output_file: str):
         except Exception as e:
             logger.error(f"Error writing batch to JSON file: {e}")
 
-def fetch_profile_chunk(loader_pair: LoaderPair, profile_name: str, start_idx: int, end_idx: int, 
+def fetch_profile_chunk(loader_pair: LoaderPair, profile_node: Dict[str, Any], profile_name: str,
+                       start_idx: int, end_idx: int, 
                        write_queue: queue.Queue, shared_processed_ids: Set[str]) -> int:
     """Fetch a chunk of posts from a profile using a loader pair"""
     posts_fetched = 0
@@ -117,7 +125,9 @@ def fetch_profile_chunk(loader_pair: LoaderPair, profile_name: str, start_idx: i
     while current_post_index < end_idx and retries < max_retries:
         try:
             current_loader = loader_pair.get_current_loader()
-            profile = instaloader.Profile.from_username(current_loader.context, profile_name)
+            profile = instaloader.Profile(current_loader.context, profile_node)
+            # The node was loaded in full by process_profile_batch just before
+            profile._has_full_metadata = True
             
             for post in profile.get_posts():
                 if posts_fetched < (current_post_index - start_idx):
@@ -185,11 +195,21 @@ def fetch_profile_chunk(loader_pair: LoaderPair, profile_name: str, start_idx: i
 def process_profile_batch(loader_pairs: List[LoaderPair], profiles: List[str], 
                          max_posts: int, shared_processed_ids: Set[str], write_queue: queue.Queue):
     """Process a batch of profiles using multiple loader pairs"""
-    posts_per_profile = max_posts
     chunks_per_profile = len(loader_pairs)
-    chunk_size = ceil(posts_per_profile / chunks_per_profile)
     
     for profile in profiles:
+        # Resolve once per profile; chunks rebuild it from the node without a request
+        try:
+            resolved = profile_cache.resolve(loader_pairs[0].get_current_loader().context, profile)
+        except ProfileUnavailableError as e:
+            logger.warning(f"Skipping {profile}: {e}")
+            continue
+        except Exception as e:
+            logger.error(f"Error resolving profile {profile}: {e}")
+            continue
+        posts_per_profile = min(max_posts, resolved.mediacount)
+        chunk_size = ceil(posts_per_profile / chunks_per_profile)
+
         chunks = [(i * chunk_size, min((i + 1) * chunk_size, posts_per_profile)) 
                  for i in range(chunks_per_profile)]
         
@@ -201,12 +221,12 @@ def process_profile_batch(loader_pairs: List[LoaderPair], profiles: List[str],
                     future = executor.submit(
                         fetch_profile_chunk,
                         loader_pairs[i],
+                        resolved._node,
                         profile,
                         start,
                         end,
                         write_queue,
-                        shared_processed_ids,
-                        write_queue
+                        shared_processed_ids
                     )
                     futures.append(future)
                 
@@ -248,7 +268,8 @@ def fetch_posts_parallel(profiles: List[str], max_posts: int = 1000,
                 all_loader_pairs[i],
                 profile_batch,
                 max_posts,
-                shared_processed_ids
+                shared_processed_ids,
+                write_queue
             )
             futures.append(future)
         
@@ -5,12 +5,14 @@ from queue import Queue
 from tqdm import tqdm
 import logging
 from math import ceil
-from dataclasses import dataclass
-from typing import Set, List, Dict
+from typing import Any, Callable, Set, List, Dict, Optional, Tuple
 import json
 import os
 import re
 
+from loader_pool import LoaderPool, LoaderPoolCoolingDownError, LoaderPoolExhaustedError
+from profile_cache import ProfileCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,11 +28,15 @@ def clean_caption(caption):
     return re.sub(r'[^a-zA-Z0-9\s]', '', caption) if caption else ""
 
 
-def writer_thread(output_file: str, write_queue: Queue):
+def writer_thread(output_file: str, write_queue: Queue, total: int = 0,
+                  on_post: Optional[Callable[[Dict[str, Any], int, int], None]] = None):
     """
-    Writer thread that accumulates posts and writes them as a list of JSON objects
+    Writer thread that accumulates posts and writes them as a list of JSON objects.
+
+    ``on_post(post, fetched, total)`` is called for every new post as it arrives.
     """
     posts = []
+    fetched = 0
     try:
         # Load existing data if file exists
         if os.path.exists(output_file):
@@ -48,47 +54,85 @@ def writer_thread(output_file: str, write_queue: Queue):
                 break
                 
             posts.append(post)
+            fetched += 1
+            if on_post is not None:
+                try:
+                    on_post(post, fetched, total)
+                except Exception as e:
+                    logger.error(f"Error in post callback: {e}")
             
             # Write the entire list to file periodically (every 10 posts)
             if len(posts) % 10 == 0:
                 with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(posts, f, indent=2, ensure_ascii=False)
+                    json.dump(posts, f, ensure_ascii=False, separators=(',', ':'))
         
         # Final write
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(posts, f, indent=2, ensure_ascii=False)
+            json.dump(posts, f, ensure_ascii=False, separators=(',', ':'))
             
     except Exception as e:
         logger.error(f"Error in writer thread: {e}")
 
-@dataclass
-class LoaderPair:
-    primary: instaloader.Instaloader
-    secondary: instaloader.Instaloader
-    current_index: int = 0
+LEASE_TIMEOUT = 120
+# Instagram returns posts in pages of 12; fewer per worker only adds requests
+MIN_POSTS_PER_WORKER = 12
 
-    def get_current_loader(self):
-        return self.primary if self.current_index == 0 else self.secondary
+def resolve_profile(pool: LoaderPool, profile_name: str,
+                    profile_cache: Optional[ProfileCache] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Look up a profile once per fetch, through the cache when one is given.
 
-    def switch_loader(self):
-        self.current_index = (self.current_index + 1) % 2
-        return self.get_current_loader()
+    Returns:
+        tuple: The profile's fully loaded raw node, fetched by this call, from
+        which each worker rebuilds a Profile bound to its own session without
+        another request, and its post count
 
-def fetch_posts_chunk(loader_pair: LoaderPair, profile_name: str, start_idx: int, end_idx: int, 
+    Raises:
+        ProfileUnavailableError: If the account does not exist or is private
+    """
+    session = pool.lease(LEASE_TIMEOUT)
+    throttled = failed = False
+    try:
+        if profile_cache is not None:
+            profile = profile_cache.resolve(session.loader.context, profile_name)
+        else:
+            profile = instaloader.Profile.from_username(session.loader.context, profile_name)
+            profile._obtain_metadata()
+        return profile._node, profile.mediacount
+    except instaloader.exceptions.TooManyRequestsException:
+        throttled = True
+        raise
+    except instaloader.exceptions.ConnectionException:
+        failed = True
+        raise
+    finally:
+        pool.release(session, throttled=throttled, failed=failed)
+
+def fetch_posts_chunk(pool: LoaderPool, profile_node: Dict[str, Any], profile_name: str, start_idx: int, end_idx: int, 
                      write_queue: Queue, shared_processed_ids: Set[str], 
                      chunk_processed_ids: Set[str]) -> int:
     """
-    Fetch a specific chunk of posts using a pair of loaders with automatic failover
+    Fetch a specific chunk of posts with sessions leased from the pool, failing
+    over to another session when one is throttled or errors
     """
     posts_fetched = 0
     current_post_index = start_idx
     retries = 0
-    max_retries = 4  # Maximum number of retries per chunk (2 attempts per loader)
+    max_retries = 4  # Maximum number of sessions tried per chunk
     
     while current_post_index < end_idx and retries < max_retries:
         try:
-            current_loader = loader_pair.get_current_loader()
-            profile = instaloader.Profile.from_username(current_loader.context, profile_name)
+            session = pool.lease(LEASE_TIMEOUT)
+        except LoaderPoolCoolingDownError:
+            raise
+        except LoaderPoolExhaustedError as e:
+            logger.error(f"Giving up on chunk {start_idx}-{end_idx}: {e}")
+            break
+        throttled = failed = False
+        try:
+            profile = instaloader.Profile(session.loader.context, profile_node)
+            # The node was loaded in full by resolve_profile during this fetch
+            profile._has_full_metadata = True
             
             for post in profile.get_posts():
                 if posts_fetched < (current_post_index - start_idx):
@@ -130,39 +174,67 @@ def fetch_posts_chunk(loader_pair: LoaderPair, profile_name: str, start_idx: int
                 current_post_index += 1
                 posts_fetched += 1
 
+            # The profile has no more posts; retrying would not find any
+            break
+
         except instaloader.exceptions.TooManyRequestsException:
-            logger.warning(f"Rate limit reached for chunk {start_idx}-{end_idx} on {'primary' if loader_pair.current_index == 0 else 'secondary'} loader")
-            loader_pair.switch_loader()
+            logger.warning(f"Rate limit reached for chunk {start_idx}-{end_idx} on session {session.id}")
+            throttled = True
             retries += 1
             if retries < max_retries:
-                logger.info(f"Switching to {'primary' if loader_pair.current_index == 0 else 'secondary'} loader and continuing from post {current_post_index}")
+                logger.info(f"Switching to another session and continuing from post {current_post_index}")
             else:
-                logger.error(f"All loaders exhausted for chunk {start_idx}-{end_idx}")
+                logger.error(f"All retries exhausted for chunk {start_idx}-{end_idx}")
                 break
                 
         except Exception as e:
             logger.error(f"Error fetching chunk {start_idx}-{end_idx}: {e}")
-            loader_pair.switch_loader()
+            failed = True
             retries += 1
             if retries < max_retries:
-                logger.info(f"Switching to {'primary' if loader_pair.current_index == 0 else 'secondary'} loader due to error")
+                logger.info("Switching to another session due to error")
             else:
                 break
+        finally:
+            pool.release(session, throttled=throttled, failed=failed)
 
     return posts_fetched
 
 def fetch_posts_parallel(profile_name: str, max_posts: int = 1000, 
                         output_file: str = "./live_data/data.json", 
-                        num_workers: int = 5) -> int:
+                        num_workers: int = 5, pool: Optional[LoaderPool] = None,
+                        profile_cache: Optional[ProfileCache] = None,
+                        on_post: Optional[Callable[[Dict[str, Any], int, int], None]] = None) -> int:
     """
-    Fetch posts for a single profile using multiple workers, each with two loaders
+    Fetch posts for a single profile using multiple workers.
+
+    Workers lease Instaloader sessions from ``pool``; pass the application's
+    long-lived pool to reuse warm sessions across fetches. Without one, a
+    pool of two sessions per worker is created for this fetch only.
+    The profile is resolved once (through ``profile_cache`` if given) and the
+    fetch is sized to its post count, so small accounts use fewer workers.
+    ``on_post(post, fetched, total)`` is called from the writer thread for
+    each post as soon as it is scraped, with the number of posts so far and
+    the number expected.
+
+    Raises:
+        ProfileUnavailableError: If the account does not exist or is private
+        LoaderPoolCoolingDownError: If every session is cooling down and no
+            post could be fetched
     """
+    if pool is None:
+        pool = LoaderPool(2 * num_workers)
+
+    profile_node, mediacount = resolve_profile(pool, profile_name, profile_cache)
+    max_posts = min(max_posts, mediacount)
+    num_workers = max(1, min(num_workers, ceil(max_posts / MIN_POSTS_PER_WORKER)))
+
     write_queue = Queue()
     shared_processed_ids = set()  # Shared across all workers
     chunk_processed_ids = [set() for _ in range(num_workers)]  # Separate set for each chunk
     
     # Start writer thread
-    writer = threading.Thread(target=writer_thread, args=(output_file, write_queue), daemon=True)
+    writer = threading.Thread(target=writer_thread, args=(output_file, write_queue, max_posts, on_post), daemon=True)
     writer.start()
     
     # Calculate chunk size for each worker
@@ -170,15 +242,8 @@ def fetch_posts_parallel(profile_name: str, max_posts: int = 1000,
     chunks = [(i * chunk_size, min((i + 1) * chunk_size, max_posts)) 
               for i in range(num_workers)]
     
-    # Create loader pairs for each worker
-    loader_pairs = [
-        LoaderPair(
-            instaloader.Instaloader(),
-            instaloader.Instaloader()
-        ) for _ in range(num_workers)
-    ]
-    
     total_fetched = 0
+    cooling_down = None
     
     with ThreadPoolExecutor(max_workers=num_workers) as executor:
         futures = []
@@ -189,7 +254,8 @@ def fetch_posts_parallel(profile_name: str, max_posts: int = 1000,
             for i, (start, end) in enumerate(chunks):
                 future = executor.submit(
                     fetch_posts_chunk,
-                    loader_pairs[i],
+                    pool,
+                    profile_node,
                     profile_name,
                     start,
                     end,
@@ -205,6 +271,9 @@ def fetch_posts_parallel(profile_name: str, max_posts: int = 1000,
                     posts_fetched = future.result()
                     total_fetched += posts_fetched
                     progress_bar.update(posts_fetched)
+                except LoaderPoolCoolingDownError as e:
+                    logger.error(f"Worker stopped: {e}")
+                    cooling_down = e
                 except Exception as e:
                     logger.error(f"Worker failed: {e}")
     
@@ -215,6 +284,10 @@ def fetch_posts_parallel(profile_name: str, max_posts: int = 1000,
     # Log completion statistics
     logger.info(f"Fetched total of {total_fetched} posts for {profile_name}")
     logger.info(f"Total unique posts processed: {len(shared_processed_ids)}")
+
+    # Posts scraped before the sessions ran out are still worth returning
+    if cooling_down is not None and not shared_processed_ids:
+        raise cooling_down
     
     return total_fetched
 
@@ -117,6 +117,23 @@ class LangflowClient:
             logger.error(error_msg)
             raise LangflowAPIError(error_msg)
 
+    def health_check(self, timeout: float = 5) -> None:
+        """
+        Check that the Langflow API is reachable.
+
+        Args:
+            timeout: Request timeout in seconds
+
+        Raises:
+            LangflowAPIError: If the API cannot be reached or returns a server error
+        """
+        try:
+            response = requests.get(self.base_api_url, timeout=timeout)
+        except RequestException as e:
+            raise LangflowAPIError(f"Failed to connect to Langflow API: {str(e)}")
+        if response.status_code >= 500:
+            raise LangflowAPIError(f"Langflow API returned {response.status_code}", status_code=response.status_code)
+
     def prepare_tweaks(self, message: str) -> Dict[str, Any]:
         """
         Prepare the tweaks based on the message.
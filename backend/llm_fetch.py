@@ -174,6 +174,20 @@ class GeminiClient:
                 logger.info(f"Retrying in {wait_time} seconds...")
                 time.sleep(wait_time)
     
+    def health_check(self) -> None:
+        """
+        Check that the Gemini API is reachable with the configured credentials
+        
+        Raises:
+            GeminiAPIError: If the model cannot be initialized or looked up
+        """
+        if not self.model and not self.initialize():
+            raise GeminiAPIError("Failed to initialize model")
+        try:
+            genai.get_model(f"models/{self.model_name}")
+        except Exception as e:
+            raise GeminiAPIError(f"Model lookup failed: {str(e)}")
+    
     def get_metrics(self) -> Dict[str, Any]:
         """Get current metrics and statistics"""
         success_rate = (
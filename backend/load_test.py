@@ -0,0 +1,304 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from benchmark import QUERIES, percentile, synthetic_posts
+
+TRAFFIC_KINDS = ("warm", "cold", "insights")
+
+
+class StandInError(Exception):
+    """Raised by a stand-in backend to simulate an upstream failure"""
+    pass
+
+
+@dataclass
+class LatencyProfile:
+    """Latency and failure behaviour of one stand-in backend"""
+    median_ms: float
+    jitter: float = 0.5
+    error_rate: float = 0.0
+
+    def wait(self, rng: random.Random, lock: threading.Lock, name: str):
+        """Sleep for a log-normally distributed time, then fail with probability ``error_rate``"""
+        with lock:
+            delay = self.median_ms * rng.lognormvariate(0, self.jitter) / 1000
+            fail = rng.random() < self.error_rate
+        time.sleep(delay)
+        if fail:
+            raise StandInError(f"{name} stand-in failure")
+
+
+class StandIns:
+    """
+    In-process replacements for AstraDB, Langflow, Gemini and Instaloader.
+
+    Calls block their (executor) thread for the configured latency, like the
+    real SDKs, so executor sizing and queueing behave as in production.
+    """
+
+    def __init__(self, profiles: Dict[str, LatencyProfile], seed: int, posts_per_account: int):
+        self.profiles = profiles
+        self.posts_per_account = posts_per_account
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.documents: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.calls: Counter = Counter()
+
+    def wait(self, name: str):
+        with self.lock:
+            self.calls[name] += 1
+        self.profiles[name].wait(self.rng, self.lock, name)
+
+    def account_posts(self, username: str, seed: int) -> List[Dict[str, Any]]:
+        """Scraper-shaped posts for ``username``; media URLs are dropped so nothing is downloaded"""
+        posts = synthetic_posts(self.posts_per_account, seed)
+        for post in posts:
+            post["username"] = username
+            post["content"] = ""
+            post["metadata"]["username"] = username
+            post["metadata"]["post_id"] = f"{username}-{post['metadata']['post_id']}"
+            post["metadata"]["urls"] = []
+        return posts
+
+    def seed_account(self, username: str, seed: int):
+        """Store an account directly, as if it had been ingested before the test"""
+        for i, post in enumerate(self.account_posts(username, seed)):
+            self.documents[username].append({"_id": f"{username}-{i}", "metadata": post["metadata"]})
+
+    # AstraDB
+    def get_collection(self, name: str):
+        self.wait("astra")
+        return self
+
+    def list_collection_names(self):
+        self.wait("astra")
+        return ["instagram_data"]
+
+    def find(self, filter: Dict[str, Any], sort=None, projection=None, limit: Optional[int] = None,
+             initial_page_state=None):
+        self.wait("astra")
+        if "$and" in filter:
+            filter = filter["$and"][0]
+        docs = sorted(self.documents.get(filter.get("metadata.username"), []),
+                      key=lambda doc: doc["metadata"]["timestamp"], reverse=True)
+        docs = docs[:limit] if limit else docs
+        return SimpleNamespace(
+            to_list=lambda: list(docs),
+            fetch_next_page=lambda: SimpleNamespace(results=list(docs), next_page_state=None)
+        )
+
+    def insert_many(self, docs: List[Dict[str, Any]], **options):
+        self.wait("astra")
+        for doc in docs:
+            username = doc["metadata"].get("username") or doc.get("$vectorize")
+            self.documents[username].append({"_id": doc["_id"], "metadata": doc["metadata"]})
+
+    # Langflow and Gemini
+    def langflow_insights(self, username: str, query: str, client) -> Dict[str, str]:
+        self.wait("langflow")
+        return {"response": f"Langflow answer for {username}: {query}"}
+
+    def get_response(self, prompt: str):
+        from llm_fetch import GeminiResponse
+        try:
+            self.wait("gemini")
+        except StandInError as e:
+            return GeminiResponse(text="", success=False, error=str(e))
+        return GeminiResponse(text=f"Gemini answer over {len(prompt)} prompt characters", success=True)
+
+    def health_check(self, *args):
+        pass
+
+    # Instaloader
+    def fetch_posts_parallel(self, username: str, max_posts: int, output_file: str, num_workers: int,
+                             pool=None, profile_cache=None, on_post=None):
+        self.wait("instaloader")
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(self.account_posts(username, zlib.crc32(username.encode()))[:max_posts], f)
+
+    def install(self, main):
+        """Point the app's clients and SDK entry points at the stand-ins"""
+        import insta_indiv_fetch
+        import langflow_fetch
+
+        clients = main.APIClients.get_instance()
+        clients._init_db = lambda: setattr(clients, "db_client", self)
+        clients._init_gemini = lambda: setattr(clients, "gemini_client", self)
+        clients._init_langflow = lambda: setattr(clients, "langflow_client", self)
+        langflow_fetch.getInsightsFromLangflow = self.langflow_insights
+        insta_indiv_fetch.fetch_posts_parallel = self.fetch_posts_parallel
+
+
+@dataclass
+class Sample:
+    kind: str
+    status: int
+    latency_ms: float
+
+
+async def virtual_user(client, user_id: int, seed: int, kinds: List[str], weights: List[float],
+                       warm_accounts: List[str], deadline: float, think_ms: float,
+                       cold_counter: Counter, samples: List[Sample]):
+    """Issue requests back to back (closed loop) until ``deadline``"""
+    rng = random.Random(seed + user_id)
+    while time.perf_counter() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "warm":
+            path, params = "/api/v1/getData", {"username": rng.choice(warm_accounts)}
+        elif kind == "cold":
+            cold_counter["cold"] += 1
+            path, params = "/api/v1/getData", {"username": f"cold_{user_id}_{cold_counter['cold']}"}
+        else:
+            path, params = "/api/v1/getInsights", {"username": rng.choice(warm_accounts),
+                                                   "query": rng.choice(QUERIES)}
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            status = response.status_code
+        except Exception:
+            status = 0
+        samples.append(Sample(kind, status, (time.perf_counter() - start) * 1000))
+        if think_ms:
+            await asyncio.sleep(think_ms / 1000)
+
+
+def report(samples: List[Sample], elapsed: float) -> Dict[str, Dict[str, float]]:
+    """Print throughput, latency percentiles and error rates per traffic kind"""
+    groups: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        groups[sample.kind].append(sample)
+    groups["total"] = samples
+
+    summary = {}
+    print(f"{'traffic':>9} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7}  statuses")
+    for kind in (*TRAFFIC_KINDS, "total"):
+        group = groups.get(kind)
+        if not group:
+            continue
+        latencies = [sample.latency_ms for sample in group]
+        errors = sum(1 for sample in group if sample.status == 0 or sample.status >= 500)
+        statuses = Counter(sample.status for sample in group)
+        summary[kind] = {
+            "p95_ms": percentile(latencies, 95),
+            "error_rate": errors / len(group),
+        }
+        print(f"{kind:>9} {len(group):>9} {len(group) / elapsed:>8.1f} {statistics.median(latencies):>8.1f} "
+              f"{percentile(latencies, 95):>8.1f} {percentile(latencies, 99):>8.1f} "
+              f"{errors / len(group):>7.1%}  "
+              + " ".join(f"{status}:{count}" for status, count in sorted(statuses.items())))
+    return summary
+
+
+async def run_load_test(args) -> Dict[str, Dict[str, float]]:
+    import httpx
+    import main
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    profiles = {
+        "astra": LatencyProfile(args.astra_ms, args.jitter, args.astra_errors),
+        "langflow": LatencyProfile(args.langflow_ms, args.jitter, args.langflow_errors),
+        "gemini": LatencyProfile(args.gemini_ms, args.jitter, args.gemini_errors),
+        "instaloader": LatencyProfile(args.instaloader_ms, args.jitter, args.instaloader_errors),
+    }
+    stand_ins = StandIns(profiles, args.seed, args.posts)
+    stand_ins.install(main)
+    warm_accounts = [f"warm_{i}" for i in range(args.warm_accounts)]
+    for i, username in enumerate(warm_accounts):
+        stand_ins.seed_account(username, args.seed + i)
+
+    await main.startup_event()
+    await main.app.state.client_init
+
+    kinds = list(TRAFFIC_KINDS)
+    weights = [args.mix[kind] for kind in kinds]
+    samples: List[Sample] = []
+    cold_counter: Counter = Counter()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, user_id, args.seed, kinds, weights, warm_accounts, deadline,
+                         args.think_ms, cold_counter, samples)
+            for user_id in range(args.users)
+        ))
+        elapsed = time.perf_counter() - start
+
+    await main.shutdown_event()
+    logging.disable(logging.NOTSET)
+
+    print(f"{args.users} users for {elapsed:.1f}s, mix {args.mix}, seed {args.seed}")
+    summary = report(samples, elapsed)
+    print("stand-in calls: " + " ".join(f"{name}:{count}" for name, count in sorted(stand_ins.calls.items())))
+    return summary
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {kind: 0.0 for kind in TRAFFIC_KINDS}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in mix:
+            raise argparse.ArgumentTypeError(f"Unknown traffic kind: {kind}")
+        mix[kind.strip()] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test main.app in process against stand-in AstraDB, Langflow, Gemini and Instaloader"
+    )
+    parser.add_argument("--users", type=int, default=50, help="Concurrent closed-loop virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic")
+    parser.add_argument("--think-ms", type=float, default=0, help="Pause between a user's requests")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("warm=70,cold=5,insights=25"),
+                        help="Traffic weights, e.g. warm=70,cold=5,insights=25")
+    parser.add_argument("--warm-accounts", type=int, default=20)
+    parser.add_argument("--posts", type=int, default=200, help="Posts per stand-in account")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jitter", type=float, default=0.5, help="Log-normal sigma of stand-in latencies")
+    for name, median_ms in (("astra", 30), ("langflow", 1500), ("gemini", 2000), ("instaloader", 5000)):
+        parser.add_argument(f"--{name}-ms", type=float, default=median_ms, help=f"Median {name} latency")
+        parser.add_argument(f"--{name}-errors", type=float, default=0.0, help=f"{name} failure rate")
+    parser.add_argument("--max-p95-ms", type=float, help="Exit non-zero if total p95 exceeds this")
+    parser.add_argument("--max-error-rate", type=float, help="Exit non-zero if the total error rate exceeds this")
+    parser.add_argument("--verbose", action="store_true", help="Keep application logging")
+    args = parser.parse_args()
+
+    # The app keeps caches, snapshots and indexes under ./live_data; run in a
+    # scratch directory so results never depend on (or pollute) local state
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(tempfile.mkdtemp(prefix="load-test-"))
+    for var in ("ASTRADB_TOKEN", "DATASTAX_API_ENDPOINT", "GEMINI_PROMPT", "GEMINI_PROMPT_2"):
+        os.environ.setdefault(var, "load-test")
+
+    summary = asyncio.run(run_load_test(args))
+
+    failures = []
+    if args.max_p95_ms is not None and summary["total"]["p95_ms"] > args.max_p95_ms:
+        failures.append(f"p95 {summary['total']['p95_ms']:.1f}ms exceeds {args.max_p95_ms}ms")
+    if args.max_error_rate is not None and summary["total"]["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {summary['total']['error_rate']:.1%} exceeds {args.max_error_rate:.1%}")
+    if failures:
+        print("SLO violated: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("instagram-api")
+
+
+class LoaderPoolExhaustedError(Exception):
+    """Raised when no healthy Instaloader session becomes available in time"""
+    pass
+
+
+class LoaderPoolCoolingDownError(LoaderPoolExhaustedError):
+    """Raised at once when every session is cooling down past the lease timeout"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Every Instaloader session is cooling down; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def default_loader_factory():
+    # Deferred so importing this module does not pull in instaloader
+    import instaloader
+    return instaloader.Instaloader()
+
+
+@dataclass
+class PooledLoader:
+    """One long-lived Instaloader session and its health record"""
+    id: int
+    loader: Any
+    score: float = 1.0
+    cooldown_until: float = 0.0
+    leased: bool = False
+    uses: int = 0
+    throttles: int = 0
+    consecutive_throttles: int = 0
+    consecutive_failures: int = 0
+
+
+class LoaderPool:
+    """
+    Fixed-size pool of warm Instaloader sessions shared by all fetches of one process.
+
+    Sessions keep their cookies, connections and rate-controller history
+    between fetches. Fetch tasks lease a session, use it, and release it
+    with the outcome: a throttled session cools down for ``cooldown``
+    seconds (doubling with each consecutive throttle, up to
+    ``max_cooldown``) before it can be leased again, and a session that
+    keeps failing is replaced with a fresh one. Among available sessions the
+    healthiest is leased first. The pool size bounds how many requests to
+    Instagram this process has in flight; with several worker processes,
+    give each its share of the rate budget.
+    """
+
+    def __init__(self, size: int, cooldown: float = 300.0, max_cooldown: float = 3600.0,
+                 max_failures: int = 3, factory: Callable[[], Any] = default_loader_factory):
+        self.size = size
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_failures = max_failures
+        self.factory = factory
+        self._condition = threading.Condition()
+        self._sessions: List[PooledLoader] = []
+
+    def _available(self, now: float) -> Optional[PooledLoader]:
+        candidates = [s for s in self._sessions if not s.leased and s.cooldown_until <= now]
+        return max(candidates, key=lambda s: s.score) if candidates else None
+
+    def lease(self, timeout: Optional[float] = None) -> PooledLoader:
+        """
+        Take the healthiest available session, creating sessions lazily up to ``size``.
+
+        Raises:
+            LoaderPoolCoolingDownError: Without waiting, if no session is leased
+                and none finishes cooling down within ``timeout`` seconds
+            LoaderPoolExhaustedError: If none is available within ``timeout`` seconds
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                now = time.time()
+                session = self._available(now)
+                if session is None and len(self._sessions) < self.size:
+                    session = PooledLoader(len(self._sessions), self.factory())
+                    self._sessions.append(session)
+                if session is not None:
+                    session.leased = True
+                    session.uses += 1
+                    return session
+
+                # Wake up when a session is released or the next cooldown ends
+                cooling = [s.cooldown_until - now for s in self._sessions if not s.leased and s.cooldown_until > now]
+                wait = min(cooling) if cooling else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    # With nothing leased, only a cooldown ending can free a session
+                    if cooling and len(cooling) == len(self._sessions) and wait > remaining:
+                        raise LoaderPoolCoolingDownError(wait)
+                    if remaining <= 0:
+                        raise LoaderPoolExhaustedError("No Instaloader session available")
+                    wait = min(wait, remaining) if wait is not None else remaining
+                self._condition.wait(wait)
+
+    def release(self, session: PooledLoader, throttled: bool = False, failed: bool = False):
+        """Return a leased session, recording whether it was throttled or failed"""
+        with self._condition:
+            if throttled:
+                session.throttles += 1
+                session.consecutive_throttles += 1
+                session.score *= 0.5
+                cooldown = min(self.cooldown * 2 ** (session.consecutive_throttles - 1), self.max_cooldown)
+                session.cooldown_until = time.time() + cooldown
+                logger.warning(f"Instaloader session {session.id} throttled, cooling down for {cooldown:.0f}s")
+            elif failed:
+                session.consecutive_failures += 1
+                session.score *= 0.8
+                if session.consecutive_failures >= self.max_failures:
+                    logger.warning(f"Replacing Instaloader session {session.id} after repeated failures")
+                    session.loader = self.factory()
+                    session.score = 1.0
+                    session.consecutive_failures = 0
+            else:
+                session.consecutive_throttles = 0
+                session.consecutive_failures = 0
+                session.score = min(1.0, session.score + 0.1)
+            session.leased = False
+            self._condition.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-session health, for monitoring"""
+        now = time.time()
+        with self._condition:
+            return {
+                "size": self.size,
+                "sessions": [
+                    {
+                        "id": s.id,
+                        "leased": s.leased,
+                        "score": round(s.score, 3),
+                        "cooling_for": max(0.0, round(s.cooldown_until - now, 1)),
+                        "uses": s.uses,
+                        "throttles": s.throttles,
+                    }
+                    for s in self._sessions
+                ],
+            }
@@ -1,16 +1,38 @@
 from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from fastapi.responses import ORJSONResponse, FileResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable, Annotated
 import os
 from dotenv import load_dotenv
-from astrapy import DataAPIClient
-from llm_fetch import GeminiClient
-from langflow_fetch import LangflowClient, getInsightsFromLangflow
-from insta_indiv_fetch import fetch_posts_parallel
+from enrichment import DERIVED_FIELDS, parse_timestamp
+from ingest import prepare_documents, upsert_documents
+from snapshot_store import SnapshotStore, summarize_columns, columnar_from_columns, columnar_from_documents
+from post_store import PostColumns, HotPostStore
+from retrieval import RetrievalIndex, select_relevant_posts
+from pagination import InvalidCursorError, encode_cursor, decode_cursor, fetch_page
+from compression import CompressionMiddleware
+from health import HealthProber
+from shared_cache import SharedCache
+from executors import WorkloadExecutors, ExecutorSaturatedError
+from media_cache import MediaCache, MediaFetchError
+from timing import TimingMiddleware, phase
+from insight_warmer import InsightWarmer
+from hashtag_index import HashtagIndex
+from rollups import RollupStore, parse_range_date
+from loader_pool import LoaderPool, LoaderPoolCoolingDownError
+from profile_cache import ProfileCache, ProfileUnavailableError, PRIVATE
+from fetch_progress import FetchProgressHub
+from query_router import RoutedQuery, route_query, answer_query
+import csv
+import io
+import math
 import uuid
 import json
+import orjson
 import logging
 import asyncio
+from contextlib import nullcontext
 from datetime import datetime
 
 # Custom exceptions
@@ -26,6 +48,17 @@ class ConfigError(Exception):
     """Raised when configuration or environment variables are invalid"""
     pass
 
+class InsightsError(Exception):
+    """Raised when no insight could be generated for a query"""
+    pass
+
+class ClientNotReadyError(Exception):
+    """Raised when a route needs an API client that is not initialized"""
+    pass
+
+# Errors that mean "try again shortly" and map to 503 rather than 500
+UNAVAILABLE_ERRORS = (ClientNotReadyError, ExecutorSaturatedError, LoaderPoolCoolingDownError)
+
 # API Clients singleton class
 class APIClients:
     _instance = None
@@ -34,34 +67,59 @@ class APIClients:
         self.db_client = None
         self.gemini_client = None
         self.langflow_client = None
+        self._ready = {name: asyncio.Event() for name in ("db", "gemini", "langflow")}
+        self._errors: Dict[str, str] = {}
         
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
             cls._instance = cls()
         return cls._instance
+
+    def _init_db(self):
+        # SDK imports are deferred so they stay off the process import path
+        from astrapy import DataAPIClient
+        client = DataAPIClient(os.getenv("ASTRADB_TOKEN"))
+        self.db_client = client.get_database_by_api_endpoint(os.getenv("DATASTAX_API_ENDPOINT"))
+
+    def _init_gemini(self):
+        from llm_fetch import GeminiClient
+        self.gemini_client = GeminiClient()
+
+    def _init_langflow(self):
+        from langflow_fetch import LangflowClient
+        self.langflow_client = LangflowClient()
+
+    async def _initialize_client(self, name: str, init):
+        try:
+            await asyncio.to_thread(init)
+            logger.info(f"Initialized {name} client")
+        except Exception as e:
+            logger.error(f"Failed to initialize {name} client: {str(e)}")
+            self._errors[name] = str(e)
+        finally:
+            self._ready[name].set()
     
     async def initialize(self):
-        """Initialize all API clients"""
-        try:
-            # Initialize AstraDB client
-            client = await asyncio.to_thread(
-                lambda: DataAPIClient(os.getenv("ASTRADB_TOKEN"))
-            )
-            self.db_client = await asyncio.to_thread(
-                lambda: client.get_database_by_api_endpoint(os.getenv("DATASTAX_API_ENDPOINT"))
-            )
-            
-            # Initialize Gemini client
-            self.gemini_client = await asyncio.to_thread(GeminiClient)
-            
-            # Initialize Langflow client
-            self.langflow_client = await asyncio.to_thread(LangflowClient)
-            
+        """Initialize all API clients concurrently"""
+        await asyncio.gather(
+            self._initialize_client("db", self._init_db),
+            self._initialize_client("gemini", self._init_gemini),
+            self._initialize_client("langflow", self._init_langflow)
+        )
+        if self._errors:
+            logger.error(f"API clients failed to initialize: {', '.join(self._errors)}")
+        else:
             logger.info("All API clients initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize API clients: {str(e)}")
-            raise
+
+    async def wait_ready(self, name: str, timeout: Optional[float] = None):
+        """Readiness gate: wait for a client to finish initializing"""
+        try:
+            await asyncio.wait_for(self._ready[name].wait(), timeout or CLIENT_READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ClientNotReadyError(f"{name} client is still initializing")
+        if name in self._errors:
+            raise ClientNotReadyError(f"{name} client failed to initialize: {self._errors[name]}")
 
 # Configure logging
 def setup_logging():
@@ -86,6 +144,129 @@ COLLECTION_NAME = "instagram"
 DATA_COUNT = 1000
 INSTALOADER_FETCH_COUNT = 100
 MAX_WORKERS = 10
+# Worker processes serving the app on this node
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Warm Instaloader sessions per node, bounding concurrent Instagram requests.
+# Each worker process gets its own pool, so the budget is split between them
+INSTALOADER_POOL_SIZE = int(os.getenv("INSTALOADER_POOL_SIZE", "10"))
+WORKER_POOL_SIZE = max(1, INSTALOADER_POOL_SIZE // WEB_CONCURRENCY)
+INSTALOADER_COOLDOWN = float(os.getenv("INSTALOADER_COOLDOWN", "300"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", str(6 * 3600)))
+# How long missing and private accounts are rejected without asking Instagram
+PROFILE_NEGATIVE_TTL = float(os.getenv("PROFILE_NEGATIVE_TTL", "3600"))
+CLIENT_READY_TIMEOUT = float(os.getenv("CLIENT_READY_TIMEOUT", "30"))
+# (max_workers, max_queue) per workload class; a scrape starts its own
+# MAX_WORKERS threads, so its executor stays small
+EXECUTOR_SIZES = {
+    "db": (int(os.getenv("DB_EXECUTOR_WORKERS", "16")), int(os.getenv("DB_EXECUTOR_QUEUE", "64"))),
+    "llm": (int(os.getenv("LLM_EXECUTOR_WORKERS", "8")), int(os.getenv("LLM_EXECUTOR_QUEUE", "32"))),
+    "scrape": (int(os.getenv("SCRAPE_EXECUTOR_WORKERS", "2")), int(os.getenv("SCRAPE_EXECUTOR_QUEUE", "4"))),
+    "media": (int(os.getenv("MEDIA_EXECUTOR_WORKERS", "4")), int(os.getenv("MEDIA_EXECUTOR_QUEUE", "64"))),
+}
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_MB", "256")) * 1024 * 1024
+MEDIA_URL_TTL = 7 * 24 * 3600
+MEDIA_PREFETCH_BATCH = 10
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "30"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "5"))
+ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", "0")) or None
+# Fields returned to clients; the vectorize text and similarity are never used
+DEFAULT_PROJECTION = {"_id": True, "metadata": True}
+COLUMNAR_PROJECTION = {
+    "_id": True, "metadata.timestamp": True, "metadata.likes": True,
+    "metadata.comments": True, "metadata.views": True, "metadata.type": True
+}
+PROJECTABLE_FIELDS = {
+    "likes", "comments", "views", "timestamp", "hashtags", "location", "music",
+    "post_id", "type", "urls", "caption", "username", "derived"
+}
+SNAPSHOT_TTL_SECONDS = float(os.getenv("SNAPSHOT_TTL_SECONDS", str(6 * 3600)))
+# Accounts whose posts each worker keeps in memory in compact form
+HOT_ACCOUNTS = int(os.getenv("HOT_ACCOUNTS", "64"))
+
+PAGE_SIZE = 50
+DATA_CACHE_TTL = float(os.getenv("DATA_CACHE_TTL", "300"))
+INSIGHTS_CACHE_TTL = float(os.getenv("INSIGHTS_CACHE_TTL", "3600"))
+INGEST_CACHE_TTL = 60.0
+PROMPT_POST_COUNT = int(os.getenv("PROMPT_POST_COUNT", "30"))
+# Hashtags listed in locally computed "top hashtags" answers that name no number
+ROUTED_HASHTAG_COUNT = 10
+MAX_BATCH_QUERIES = 20
+MAX_BATCH_USERNAMES = 20
+BATCH_SCRAPE_CONCURRENCY = int(os.getenv("BATCH_SCRAPE_CONCURRENCY", "2"))
+# Each scrape writes its own output file so concurrent scrapes never collide
+SCRAPE_DIR = "./live_data/scrapes"
+INSIGHTS_BATCH_CONCURRENCY = int(os.getenv("INSIGHTS_BATCH_CONCURRENCY", "4"))
+
+def parse_warm_queries(raw: str) -> List[str]:
+    """
+    Split a "|"-separated WARM_QUERIES value into the questions worth precomputing.
+
+    Questions the query router answers locally (e.g. "What is my average number
+    of likes?") are cheap on demand, so they are dropped with a log line.
+    """
+    queries = []
+    for query in raw.split("|"):
+        query = query.strip()
+        if not query:
+            continue
+        if route_query(query) is not None:
+            logger.info(f"Not warming {query!r}: the query router answers it without the LLM")
+            continue
+        queries.append(query)
+    return queries
+
+# Questions precomputed for the most requested accounts, separated by "|"; locally
+# routable questions are skipped (see parse_warm_queries)
+WARM_QUERIES = parse_warm_queries(os.getenv(
+    "WARM_QUERIES",
+    "How can I improve my engagement?|What kind of content should I post next?|"
+    "Summarize how my account has been performing"
+))
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "20"))
+WARM_INTERVAL = float(os.getenv("WARM_INTERVAL", "300"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+# Fraction of requests run under the sampling profiler; 0 disables it
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./live_data/profiles")
+# Idle time after which /getData/stream sends a keep-alive comment
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+# Local per-username snapshots serving warm reads without AstraDB
+snapshot_store = SnapshotStore(ttl_seconds=SNAPSHOT_TTL_SECONDS)
+# Compact in-memory posts of recently read accounts, built from their snapshots
+hot_posts = HotPostStore(max_accounts=HOT_ACCOUNTS)
+# Local caption/hashtag vector index used to keep insight prompts small
+retrieval_index = RetrievalIndex()
+# Node-local cache shared by all worker processes
+shared_cache = SharedCache()
+# Separate bounded thread pools for AstraDB, LLM and scraping work, so slow
+# calls of one kind cannot starve the others
+executors = WorkloadExecutors(EXECUTOR_SIZES)
+# This worker's share of the node's Instaloader sessions, leased to scrape threads; created on first use
+loader_pool = LoaderPool(WORKER_POOL_SIZE, cooldown=INSTALOADER_COOLDOWN)
+# Resolved profile metadata, plus negative entries for missing and private accounts
+profile_cache = ProfileCache(shared_cache, ttl=PROFILE_CACHE_TTL, negative_ttl=PROFILE_NEGATIVE_TTL)
+# Scrape progress and posts pushed to /api/v1/getData/stream clients as they arrive
+fetch_progress = FetchProgressHub()
+# Downsized post thumbnails, served by /api/v1/media/{post_id}
+media_cache = MediaCache(max_bytes=MEDIA_CACHE_MAX_BYTES)
+# Hashtag -> posts index with engagement aggregates, updated on ingest
+hashtag_index = HashtagIndex()
+# Day/week/month engagement rollups per account and content type, updated on ingest
+rollup_store = RollupStore()
+# Precomputes WARM_QUERIES for popular accounts while the LLM executor is idle
+insight_warmer = InsightWarmer(
+    shared_cache,
+    compute=lambda username, query: generate_insights(username, query),
+    cache_key=lambda username, query: insights_cache_key(username, query),
+    queries=WARM_QUERIES,
+    is_idle=lambda: executors["llm"].is_idle(),
+    top_n=WARM_TOP_N,
+    ttl=INSIGHTS_CACHE_TTL,
+    interval=WARM_INTERVAL,
+)
+# Strong references to fire-and-forget tasks so they are not garbage collected
+background_tasks = set()
 
 # Load environment variables
 async def init_environment():
@@ -110,7 +291,8 @@ async def init_environment():
 # Initialize FastAPI app
 app = FastAPI(
     title="Instagram Data Insights API",
-    description="API for fetching and analyzing Instagram data"
+    description="API for fetching and analyzing Instagram data",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -122,192 +304,980 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated brotli/gzip for large response bodies
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+# Server-Timing breakdown and slow-request logging; added last so it is the
+# outermost layer and its total covers the whole request
+app.add_middleware(
+    TimingMiddleware,
+    slow_request_ms=SLOW_REQUEST_MS,
+    profile_sample_rate=PROFILE_SAMPLE_RATE,
+    profile_dir=PROFILE_DIR,
+)
+
 # Initialize environment and clients on startup
 @app.on_event("startup")
 async def startup_event():
     try:
         await init_environment()
-        await APIClients.get_instance().initialize()
+        # Clients initialize in the background so the server accepts requests
+        # immediately; routes that need a client wait on its readiness gate
+        app.state.client_init = asyncio.create_task(APIClients.get_instance().initialize())
+        health_prober.start()
+        insight_warmer.start()
         logger.info("Application started successfully")
     except Exception as e:
         logger.error(f"Startup failed: {str(e)}")
         raise
 
+@app.exception_handler(ClientNotReadyError)
+@app.exception_handler(ExecutorSaturatedError)
+async def service_unavailable_handler(request: Request, exc: Exception):
+    return ORJSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+@app.exception_handler(LoaderPoolCoolingDownError)
+async def sessions_cooling_down_handler(request: Request, exc: LoaderPoolCoolingDownError):
+    # Scraping cannot resume before the first throttled session recovers
+    retry_after = max(1, math.ceil(exc.retry_after))
+    return ORJSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(retry_after)})
+
 async def get_collection(collection_name: str):
     """Get AstraDB collection with error handling asynchronously"""
+    clients = APIClients.get_instance()
+    await clients.wait_ready("db")
     try:
-        db = APIClients.get_instance().db_client
-        return await asyncio.to_thread(lambda: db.get_collection(collection_name))
+        db = clients.db_client
+        return await executors["db"].run(lambda: db.get_collection(collection_name))
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Failed to get collection {collection_name}: {str(e)}")
         raise AstraDBError(f"Collection access failed: {str(e)}")
 
-async def get_astra_data(username: str, count: int, collection_name: str) -> List[Dict[str, Any]]:
-    """Fetch data from AstraDB asynchronously"""
+async def get_astra_data(username: str, count: int, collection_name: str,
+                         projection: Optional[Dict[str, bool]] = None) -> List[Dict[str, Any]]:
+    """Fetch a user's most recent posts from AstraDB asynchronously"""
     try:
         collection = await get_collection(collection_name)
-        results = await asyncio.to_thread(
+        # Plain indexed filter with a timestamp sort: no server-side embedding or
+        # ANN search, and results come back newest first
+        results = await executors["db"].run(
             lambda: collection.find(
-                filter={"$and": [{"metadata.username": {"$eq": username}}]},
-                sort={"$vectorize": username},
+                filter={"metadata.username": username},
+                sort={"metadata.timestamp": -1},
                 limit=count,
-                projection={"$vectorize": True},
-                include_similarity=True
-            )
+                projection=projection or DEFAULT_PROJECTION
+            ).to_list()
         )
-        return list(results)
+        return results
+    except UNAVAILABLE_ERRORS:
+        raise
     except Exception as e:
         logger.error(f"Data fetch failed for {username}: {str(e)}")
         raise AstraDBError(f"Data fetch failed: {str(e)}")
 
-def format_data_as_csv(data: List[Dict[str, Any]]) -> str:
-    """Format data as CSV string"""
+# Column names of the prompt's post table; post_hour and post_weekday (0 = Monday) are UTC
+CSV_HEADER = ["post_id", "likes", "comments", "views", "timestamp", "hashtags", "caption", "type", *DERIVED_FIELDS]
+
+def format_data_as_csv(posts: PostColumns, positions: List[int]) -> str:
+    """Format the posts at ``positions`` as CSV, with a header row naming every column"""
     try:
-        csv_lines = []
-        for item in data:
-            metadata = item.get('metadata', {})
-            row = [
-                str(metadata.get("post_id", "")),
-                str(metadata.get("likes", "")),
-                str(metadata.get("comments", "")),
-                str(metadata.get("views", "")),
-                str(metadata.get("timestamp", "")),
-                str(metadata.get("hashtags", [])),
-                str(metadata.get("caption", "").strip().replace('\n', ' ')),
-                str(metadata.get("type", ""))
-            ]
-            csv_lines.append(",".join(row))
-        return "\n".join(csv_lines)
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(CSV_HEADER)
+        for i in positions:
+            derived = posts.derived(i)
+            writer.writerow([
+                posts.post_ids[i],
+                posts.likes[i],
+                posts.comments[i],
+                posts.views[i],
+                posts.timestamp_string(i),
+                " ".join(posts.hashtags[i]),
+                posts.captions[i].strip().replace('\n', ' '),
+                posts.type_name(i),
+                *(derived[name] for name in DERIVED_FIELDS)
+            ])
+        return output.getvalue().rstrip("\n")
     except Exception as e:
         logger.error(f"CSV formatting failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to format data")
 
+def parse_fields(fields: Optional[str]) -> Dict[str, bool]:
+    """Turn a comma-separated ``fields`` parameter into an AstraDB projection"""
+    if not fields:
+        return DEFAULT_PROJECTION
+    projection = {"_id": True}
+    for field in fields.split(","):
+        name = field.strip()
+        if name.startswith("metadata."):
+            name = name[len("metadata."):]
+        if name not in PROJECTABLE_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {field.strip()}")
+        projection[f"metadata.{name}"] = True
+    return projection
+
+def project_document(doc: Dict[str, Any], projection: Dict[str, bool]) -> Dict[str, Any]:
+    """Apply a projection from parse_fields to a locally stored document"""
+    if projection is DEFAULT_PROJECTION:
+        return {"_id": doc.get("_id"), "metadata": doc.get("metadata", {})}
+    metadata = doc.get("metadata", {})
+    return {
+        "_id": doc.get("_id"),
+        "metadata": {
+            path[len("metadata."):]: metadata.get(path[len("metadata."):])
+            for path in projection if path.startswith("metadata.")
+        }
+    }
+
+async def load_hot_posts(username: str) -> Optional[PostColumns]:
+    """A user's posts in compact form if a fresh snapshot exists, memory-mapped from it on first use"""
+    version = await asyncio.to_thread(snapshot_store.fresh_version, username)
+    if version is None:
+        return None
+    posts = hot_posts.get(username, version)
+    if posts is None:
+        with phase("snapshot"):
+            loaded = await asyncio.to_thread(snapshot_store.load_columns, username)
+            if loaded is None or not loaded[1]["post_ids"]:
+                return None
+            posts = await asyncio.to_thread(PostColumns.from_snapshot, username, *loaded)
+        hot_posts.put(posts, version)
+    return posts
+
+async def load_posts(username: str, count: int) -> Optional[PostColumns]:
+    """Load a user's posts from memory or the local snapshot, falling back to AstraDB"""
+    posts = await load_hot_posts(username)
+    if posts is not None:
+        return posts
+    docs = await get_astra_data(username, count, COLLECTION_NAME)
+    if not docs:
+        return None
+    return await asyncio.to_thread(PostColumns.from_documents, username, docs)
+
+async def load_insights_data(username: str) -> Tuple[Optional[PostColumns], Optional[Dict[str, Any]]]:
+    """Load a user's posts and summary stats, the query-independent part of the prompt"""
+    posts = await load_posts(username, DATA_COUNT)
+    if posts is None:
+        return None, None
+
+    summary = await shared_cache.get_or_compute(
+        f"summary:{username}:stats",
+        lambda: asyncio.to_thread(summarize_columns, posts.columns(DATA_COUNT)),
+        ttl=DATA_CACHE_TTL
+    )
+    return posts, summary
+
+def shared_insights_loader(username: str) -> Callable[[], Awaitable[Tuple[Optional[PostColumns], Optional[Dict[str, Any]]]]]:
+    """Return a loader that runs load_insights_data at most once, however many callers await it"""
+    task = None
+
+    async def load():
+        nonlocal task
+        if task is None:
+            task = asyncio.ensure_future(load_insights_data(username))
+        return await task
+
+    return load
+
+async def build_insights_context(username: str, query: str,
+                                 load_data: Optional[Callable[[], Awaitable]] = None) -> str:
+    """Summary stats plus the posts most relevant to the query, formatted for the prompt"""
+    posts, summary = await (load_data or shared_insights_loader(username))()
+    if posts is None:
+        return ""
+
+    def select():
+        index = retrieval_index.get(username, posts)
+        relevant = select_relevant_posts(index, posts, query, PROMPT_POST_COUNT)
+        return (f"Account summary (JSON): {json.dumps(summary)}\n"
+                f"Posts most relevant to the question (CSV):\n{format_data_as_csv(posts, relevant)}")
+
+    return await asyncio.to_thread(select)
+
+async def ingest_posts(username: str, json_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Enrich scraped posts and store them in AstraDB, replacing earlier copies of the same posts"""
+    # Derived features are computed once here and stored with each document
+    with phase("enrich"):
+        processed_data = await asyncio.to_thread(prepare_documents, json_data, ENRICHMENT_WORKERS)
+
+    collection = await get_collection(COLLECTION_NAME)
+    await executors["db"].run(upsert_documents, collection, processed_data)
+    posts = await save_snapshot(username, processed_data)
+    await update_analytics(username, processed_data)
+    await asyncio.to_thread(retrieval_index.build, username, posts)
+    await asyncio.to_thread(invalidate_user_cache, username)
+    insight_warmer.notify(username)
+    await schedule_media_prefetch(processed_data)
+    return processed_data
+
+def run_in_background(coro):
+    """Run a coroutine without awaiting it, keeping a reference until it finishes"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def track_request(username: str):
+    """Count a request towards the insight warmer's popularity ranking"""
+    try:
+        await asyncio.to_thread(insight_warmer.record_request, username)
+    except Exception as e:
+        logger.warning(f"Failed to record request for {username}: {str(e)}")
+
+async def schedule_media_prefetch(docs: List[Dict[str, Any]]):
+    """Record each post's media URL and download thumbnails in the background"""
+    urls = {}
+    for doc in docs:
+        metadata = doc.get("metadata", {})
+        if metadata.get("post_id") and metadata.get("urls"):
+            urls[metadata["post_id"]] = metadata["urls"][0]
+    if not urls:
+        return
+
+    def register():
+        for post_id, url in urls.items():
+            shared_cache.set(f"media-url:{post_id}", url, ttl=MEDIA_URL_TTL)
+    await asyncio.to_thread(register)
+
+    async def prefetch(batch: Dict[str, str]):
+        try:
+            await executors["media"].run(media_cache.prefetch, batch)
+        except Exception as e:
+            logger.warning(f"Thumbnail prefetch failed: {str(e)}")
+
+    items = list(urls.items())
+    for i in range(0, len(items), MEDIA_PREFETCH_BATCH):
+        run_in_background(prefetch(dict(items[i:i + MEDIA_PREFETCH_BATCH])))
+
+def invalidate_user_cache(username: str):
+    """Drop shared-cache entries derived from a user's previous data"""
+    for prefix in ("data", "insights", "summary"):
+        shared_cache.delete_prefix(f"{prefix}:{username}:")
+
+async def save_snapshot(username: str, docs: List[Dict[str, Any]]) -> PostColumns:
+    """
+    Write the local snapshot for a user and keep its posts in memory, logging
+    rather than failing the request if the write fails.
+    """
+    posts = await asyncio.to_thread(PostColumns.from_documents, username, docs)
+    try:
+        version = await asyncio.to_thread(snapshot_store.write, username, posts)
+        hot_posts.put(posts, version)
+    except Exception as e:
+        logger.warning(f"Skipping snapshot for {username}: {str(e)}")
+    return posts
+
+async def update_analytics(username: str, docs: List[Dict[str, Any]]):
+    """Fold posts into the hashtag index and rollups, logging rather than failing the request"""
+    def update():
+        hashtag_index.index_posts(username, docs)
+        rollup_store.update(username, docs)
+
+    try:
+        await asyncio.to_thread(update)
+    except Exception as e:
+        logger.warning(f"Skipping analytics update for {username}: {str(e)}")
+
+async def check_astra():
+    clients = APIClients.get_instance()
+    await clients.wait_ready("db", HEALTH_PROBE_TIMEOUT)
+    await executors["db"].run(clients.db_client.list_collection_names)
+
+async def check_langflow():
+    clients = APIClients.get_instance()
+    await clients.wait_ready("langflow", HEALTH_PROBE_TIMEOUT)
+    await executors["llm"].run(clients.langflow_client.health_check, HEALTH_PROBE_TIMEOUT)
+
+async def check_gemini():
+    clients = APIClients.get_instance()
+    await clients.wait_ready("gemini", HEALTH_PROBE_TIMEOUT)
+    await executors["llm"].run(clients.gemini_client.health_check)
+
+# Dependency checks run on a schedule; health endpoints only read the cache
+health_prober = HealthProber(
+    {"astradb": check_astra, "langflow": check_langflow, "gemini": check_gemini},
+    required=("astradb",),
+    interval=HEALTH_PROBE_INTERVAL,
+    timeout=HEALTH_PROBE_TIMEOUT
+)
+
 @app.api_route("/api/v1/health", methods=["GET", "HEAD"])
 async def health_check(request: Request):
-    """Health check endpoint"""
+    """Health check endpoint, answered from the cached AstraDB probe"""
     if request.method == "HEAD":
         logger.info("Received a HEAD request for /api/v1/health")
-    try:
-        await get_collection(COLLECTION_NAME)
+    astra = health_prober.statuses.get("astradb")
+    if astra is not None and astra.healthy:
         return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    error = astra.error if astra is not None else "AstraDB has not been probed yet"
+    return {"status": "unhealthy", "error": error, "timestamp": datetime.now().isoformat()}
+
+@app.api_route("/api/v1/health/live", methods=["GET", "HEAD"])
+async def liveness():
+    """Liveness endpoint: the process is up and serving"""
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+async def find_media_url(post_id: str) -> Optional[str]:
+    """
+    Source URL of a post's thumbnail: registered at ingest, otherwise looked up
+    in AstraDB (for posts stored before their URL was registered) and registered.
+    """
+    key = f"media-url:{post_id}"
+    url = await asyncio.to_thread(shared_cache.get, key)
+    if url is not None:
+        return url
+    try:
+        collection = await get_collection(COLLECTION_NAME)
+        doc = await executors["db"].run(
+            lambda: collection.find_one({"metadata.post_id": post_id}, projection={"metadata.urls": True})
+        )
+    except UNAVAILABLE_ERRORS:
+        raise
+    except Exception as e:
+        logger.error(f"Media URL lookup failed for {post_id}: {str(e)}")
+        raise HTTPException(status_code=502, detail="Failed to look up media")
+    urls = (doc or {}).get("metadata", {}).get("urls") or []
+    if not urls:
+        return None
+    await asyncio.to_thread(shared_cache.set, key, urls[0], ttl=MEDIA_URL_TTL)
+    return urls[0]
+
+@app.get("/api/v1/media/{post_id}")
+async def get_media(post_id: str, request: Request):
+    """Serve a post's cached thumbnail, fetching it on demand if needed"""
+    try:
+        path = await asyncio.to_thread(media_cache.get, post_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if path is None:
+        url = await find_media_url(post_id)
+        if url is None:
+            raise HTTPException(status_code=404, detail="Unknown post media")
+        try:
+            path = await executors["media"].run(media_cache.fetch, post_id, url)
+        except MediaFetchError as e:
+            logger.warning(str(e))
+            raise HTTPException(status_code=502, detail="Failed to fetch media")
+
+    # Thumbnails never change for a post id, so they can be cached forever
+    etag = f'"{post_id}"'
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
+
+@app.get("/api/v1/metrics/executors")
+async def executor_metrics():
+    """Queue depth and counters for each workload executor, plus Instaloader session health"""
+    return {**executors.stats(), "instaloader_sessions": loader_pool.stats()}
+
+@app.api_route("/api/v1/health/ready", methods=["GET", "HEAD"])
+async def readiness():
+    """Readiness endpoint: cached per-dependency status and latency"""
+    report = health_prober.readiness()
+    status_code = 503 if report["status"] == "unavailable" else 200
+    return ORJSONResponse(status_code=status_code, content=report)
+
+async def get_astra_page(username: str, page_size: int, since: Optional[str] = None,
+                         page_state: Optional[str] = None, offset: int = 0,
+                         projection: Optional[Dict[str, bool]] = None):
+    """Fetch one page of a user's posts from AstraDB, newest first"""
+    try:
+        collection = await get_collection(COLLECTION_NAME)
+        filter = {"metadata.username": username}
+        if since:
+            filter = {"$and": [filter, {"metadata.timestamp": {"$gte": since}}]}
+        return await executors["db"].run(
+            fetch_page,
+            collection,
+            filter,
+            {"metadata.timestamp": -1},
+            projection or DEFAULT_PROJECTION,
+            page_size,
+            page_state,
+            offset
+        )
+    except UNAVAILABLE_ERRORS:
+        raise
+    except Exception as e:
+        logger.error(f"Page fetch failed for {username}: {str(e)}")
+        raise AstraDBError(f"Page fetch failed: {str(e)}")
+
+def profile_unavailable_http_error(error: ProfileUnavailableError) -> HTTPException:
+    """403 for private accounts, 404 for missing ones"""
+    return HTTPException(status_code=403 if error.reason == PRIVATE else 404, detail=str(error))
+
+def reject_unavailable_profile(username: str):
+    """Fail fast for usernames already known to be missing or private"""
+    # A single indexed SQLite read; cheaper inline than a thread hop
+    try:
+        profile_cache.check(username)
+    except ProfileUnavailableError as e:
+        raise profile_unavailable_http_error(e)
+
+async def fetch_and_ingest(username: str) -> List[Dict[str, Any]]:
+    """Scrape a user's posts from Instagram and ingest them"""
+    from insta_indiv_fetch import fetch_posts_parallel
+
+    logger.info(f"No data found in AstraDB for {username}, fetching from Instagram")
+    output_file = os.path.join(SCRAPE_DIR, f"{uuid.uuid4().hex}.json")
+
+    def on_post(post: Dict[str, Any], fetched: int, total: int):
+        # Called from the scraper's writer thread
+        fetch_progress.publish_threadsafe(username, {
+            "event": "post",
+            "data": {"post": {"metadata": post.get("metadata", {})}, "fetched": fetched, "total": total},
+        })
+
+    fetch_progress.begin(username)
+    fetch_progress.publish(username, {"event": "progress", "data": {"stage": "scraping"}})
+    try:
+        # Ensure directory exists
+        await asyncio.to_thread(lambda: os.makedirs(SCRAPE_DIR, exist_ok=True))
+        
+        # Fetch posts from Instagram on the scrape executor since fetch_posts_parallel is synchronous
+        await executors["scrape"].run(
+            fetch_posts_parallel,
+            username,
+            max_posts=INSTALOADER_FETCH_COUNT,
+            output_file=output_file,
+            num_workers=MAX_WORKERS,
+            pool=loader_pool,
+            profile_cache=profile_cache,
+            on_post=on_post
+        )
+        
+        # Read the fetched data
+        def read_output():
+            with open(output_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        json_data = await asyncio.to_thread(read_output)
+        
+        if not json_data:
+            raise InstagramFetchError("No data fetched from Instagram")
+        
+        # Enrich, process and store data
+        fetch_progress.publish(username, {"event": "progress", "data": {"stage": "storing", "fetched": len(json_data)}})
+        result = await ingest_posts(username, json_data)
+        
+        logger.info(f"Successfully fetched and stored {len(result)} posts for {username}")
+        return result
+        
+    except UNAVAILABLE_ERRORS:
+        raise
+    except ProfileUnavailableError as e:
+        raise profile_unavailable_http_error(e)
+    except Exception as e:
+        logger.error(f"Instagram fetch failed: {str(e)}")
+        raise InstagramFetchError(f"Instagram fetch failed: {str(e)}")
+    finally:
+        fetch_progress.end(username)
+        # Cleanup
+        if os.path.exists(output_file):
+            await asyncio.to_thread(os.remove, output_file)
+
+async def get_data_page(username: str, page_size: Optional[int], cursor: Optional[str],
+                        since: Optional[str], projection: Dict[str, bool]) -> Dict[str, Any]:
+    """Serve one cursor-paginated page of a user's posts"""
+    page_state, offset = None, 0
+    if cursor:
+        try:
+            state = decode_cursor(cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if state.get("username") != username:
+            raise HTTPException(status_code=400, detail="Cursor does not belong to this username")
+        page_size = page_size or state.get("page_size")
+        since = state.get("since")
+        page_state, offset = state.get("page_state"), state.get("offset", 0)
+    page_size = page_size or PAGE_SIZE
+
+    if since and parse_timestamp(since) is None:
+        raise HTTPException(status_code=400, detail="since must be formatted as YYYY-MM-DD HH:MM:SS")
+
+    items, resume = await get_astra_page(username, page_size, since, page_state, offset, projection)
+
+    # A first page with nothing stored means the account has never been fetched;
+    # the scrape is shared with /getData so each node runs it once
+    if not items and not cursor and not since:
+        await shared_cache.get_or_compute(
+            f"ingest:{username}", lambda: fetch_and_ingest(username), ttl=INGEST_CACHE_TTL
+        )
+        items, resume = await get_astra_page(username, page_size, projection=projection)
+
+    next_cursor = None
+    if resume is not None:
+        next_cursor = encode_cursor({
+            "username": username,
+            "page_size": page_size,
+            "since": since,
+            **resume
+        })
+    return {"items": items, "next_cursor": next_cursor}
+
+def data_cache_key(username: str, count: int, format: str, fields: Optional[str]) -> str:
+    """Shared-cache key for a non-paginated getData body"""
+    return f"data:{username}:{count}:{format}:{fields or ''}"
+
+async def build_data_response(username: str, count: int, projection: Dict[str, bool],
+                              columnar: bool, scrape_slots: Optional[asyncio.Semaphore] = None) -> Any:
+    """
+    Build a non-paginated getData body from the snapshot, AstraDB or a fresh scrape.
+
+    ``scrape_slots`` bounds how many scrapes a batch request runs at once.
+    """
+    # Serve hot accounts from their in-memory posts; columnar reads use the arrays as they are
+    posts = await load_hot_posts(username)
+    if posts is not None:
+        logger.info(f"Serving {username} from local snapshot")
+        if columnar:
+            return columnar_from_columns(posts.columns(), count)
+        fields = None if projection is DEFAULT_PROJECTION else [
+            path[len("metadata."):] for path in projection if path.startswith("metadata.")
+        ]
+        return await asyncio.to_thread(posts.documents, count, fields)
+
+    # Try AstraDB next
+    result = await get_astra_data(username, count, COLLECTION_NAME, projection)
+
+    # Only a complete, full-field result set can stand in for AstraDB later
+    if result and len(result) < count and projection is DEFAULT_PROJECTION:
+        await save_snapshot(username, result)
+        await update_analytics(username, result)
+    
+    # Fallback to Instagram fetch if no data; the lease makes sure only one
+    # worker on the node scrapes a given account at a time
+    if not result:
+        async with scrape_slots or nullcontext():
+            scraped = await shared_cache.get_or_compute(
+                f"ingest:{username}", lambda: fetch_and_ingest(username), ttl=INGEST_CACHE_TTL
+            )
+        result = [project_document(doc, projection) for doc in scraped]
+
+    if columnar:
+        return columnar_from_documents(result[:count])
+    return result
+
+@app.get("/api/v1/hashtags")
+async def get_hashtags(
+    username: Optional[str] = Query(None, min_length=1, max_length=30),
+    k: int = Query(20, gt=0, le=200),
+    prefix: Optional[str] = Query(None, min_length=1, max_length=100),
+    sort: str = Query("count", pattern="^(count|likes|comments)$"),
+    min_posts: int = Query(1, gt=0),
+    include_posts: bool = Query(False)
+):
+    """
+    Top hashtags by usage or mean engagement, for one account or across all accounts.
+
+    ``prefix`` restricts the result to hashtags starting with it, for
+    autocomplete-style lookups; ``include_posts`` adds the ids of the posts
+    using each hashtag.
+    """
+    try:
+        normalized_prefix = prefix.lstrip("#").lower() if prefix else None
+        hashtags = await asyncio.to_thread(
+            hashtag_index.top, username, k, normalized_prefix, sort, min_posts, include_posts
+        )
+        return {"username": username, "hashtags": hashtags}
+    except Exception as e:
+        logger.error(f"Hashtag lookup failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to look up hashtags")
+
+@app.get("/api/v1/rollups")
+async def get_rollups(
+    username: str = Query(..., min_length=1, max_length=30),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    start: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    type: Optional[str] = Query(None, min_length=1)
+):
+    """
+    Post count and like, comment and view totals per day, week or month.
+
+    ``start``/``end`` (YYYY-MM-DD, inclusive) select the buckets containing
+    those dates; weeks start on Sunday. Each bucket also breaks the totals
+    down by content type.
+    """
+    try:
+        start_date, end_date = parse_range_date(start), parse_range_date(end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        buckets = await asyncio.to_thread(rollup_store.query, username, granularity, start_date, end_date, type)
+        return {"username": username, "granularity": granularity, "buckets": buckets}
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return {"status": "unhealthy", "error": str(e), "timestamp": datetime.now().isoformat()}
+        logger.error(f"Rollup query failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to read rollups")
 
 @app.get("/api/v1/getData")
 async def get_data(
     username: str = Query(..., min_length=1, max_length=30),
-    count: int = Query(..., gt=0, le=1000)
+    count: int = Query(DATA_COUNT, gt=0, le=1000),
+    page_size: Optional[int] = Query(None, gt=0, le=1000),
+    cursor: Optional[str] = Query(None, min_length=1),
+    since: Optional[str] = Query(None, min_length=1),
+    fields: Optional[str] = Query(None, min_length=1),
+    format: str = Query("rows", pattern="^(rows|columnar)$")
 ):
-    """Fetch Instagram data endpoint"""
+    """
+    Fetch Instagram data endpoint.
+
+    Without ``page_size``/``cursor``/``since`` this returns up to ``count`` posts
+    as a list. With any of them it returns ``{"items", "next_cursor"}``; pass
+    ``next_cursor`` back as ``cursor`` to read the following page.
+    ``fields`` is a comma-separated list of metadata fields to return.
+    ``format=columnar`` returns parallel timestamp/likes/comments/views/type
+    arrays under ``columns`` instead of one object per post.
+    """
     try:
+        reject_unavailable_profile(username)
+        run_in_background(track_request(username))
+        columnar = format == "columnar"
+        projection = COLUMNAR_PROJECTION if columnar else parse_fields(fields)
+
+        if page_size or cursor or since:
+            logger.info(f"Fetching data page for username: {username}, page_size: {page_size}")
+            page = await get_data_page(username, page_size, cursor, since, projection)
+            if columnar:
+                page = {**columnar_from_documents(page["items"]), "next_cursor": page["next_cursor"]}
+            return ORJSONResponse(page)
+
         logger.info(f"Fetching data for username: {username}, count: {count}")
+
+        # A cached body is already JSON, so it is sent as stored instead of being decoded and re-encoded
+        key = data_cache_key(username, count, format, fields)
+        with phase("cache"):
+            raw = await asyncio.to_thread(shared_cache.get_raw, key)
+        if raw is not None:
+            return Response(raw, media_type="application/json")
+
+        # Built once per node and shared by all workers through the cache
+        body = await shared_cache.get_or_compute(
+            key,
+            lambda: build_data_response(username, count, projection, columnar),
+            ttl=DATA_CACHE_TTL
+        )
         
-        # Try AstraDB first
-        result = await get_astra_data(username, count, COLLECTION_NAME)
-        
-        # Fallback to Instagram fetch if no data
-        if not result:
-            logger.info(f"No data found in AstraDB for {username}, fetching from Instagram")
-            try:
-                # Ensure directory exists
-                await asyncio.to_thread(lambda: os.makedirs("./live_data", exist_ok=True))
-                
-                # Fetch posts from Instagram - wrapped in asyncio.to_thread since fetch_posts_parallel is synchronous
-                await asyncio.to_thread(
-                    fetch_posts_parallel,
-                    username,
-                    max_posts=INSTALOADER_FETCH_COUNT,
-                    output_file="./live_data/data.json",
-                    num_workers=MAX_WORKERS
-                )
-                
-                # Read the fetched data
-                json_data = await asyncio.to_thread(
-                    lambda: json.load(open("./live_data/data.json", "r"))
-                )
-                
-                if not json_data:
-                    raise InstagramFetchError("No data fetched from Instagram")
-                
-                # Process and store data
-                processed_data = []
-                for doc in json_data:
-                    doc["$vectorize"] = doc.pop("username")
-                    doc["_id"] = uuid.uuid4().hex
-                    processed_data.append(doc)
-                
-                # Store in AstraDB
-                collection = await get_collection(COLLECTION_NAME)
-                await asyncio.to_thread(
-                    lambda: collection.insert_many(processed_data)
-                )
-                result = processed_data
-                
-                logger.info(f"Successfully fetched and stored {len(result)} posts for {username}")
-                
-            except Exception as e:
-                logger.error(f"Instagram fetch failed: {str(e)}")
-                raise InstagramFetchError(f"Instagram fetch failed: {str(e)}")
-            finally:
-                # Cleanup
-                if os.path.exists("./live_data/data.json"):
-                    await asyncio.to_thread(lambda: os.remove("./live_data/data.json"))
-        
-        return result
+        # Returning the response directly skips FastAPI's jsonable_encoder pass
+        return ORJSONResponse(body)
         
-    except HTTPException as e:
-        raise e
+    except (HTTPException, *UNAVAILABLE_ERRORS):
+        raise
     except Exception as e:
         logger.error(f"Error in getData: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/v1/getInsights")
-async def get_insights(
-    username: str = Query(..., min_length=1, max_length=30),
-    query: str = Query(..., min_length=1)
-):
-    """Get insights endpoint"""
+def sse_event(event: str, data: Any) -> bytes:
+    """Encode one server-sent event"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+@app.get("/api/v1/getData/stream")
+async def stream_data(username: str = Query(..., min_length=1, max_length=30)):
+    """
+    Stream a user's posts as server-sent events.
+
+    For an account that has to be scraped, every post is pushed as a
+    ``post`` event (``{"post", "fetched", "total"}``) as soon as the scraper
+    produces it, with ``progress`` events marking the scraping and storing
+    stages. Stored accounts, and scrapes running in another worker process,
+    arrive as a single ``posts`` event holding the list /getData returns.
+    The stream ends with ``complete`` (``{"count"}``) or ``error``
+    (``{"status", "detail"}``). The scrape is shared with /getData and
+    carries on if the client disconnects.
+    """
+    reject_unavailable_profile(username)
+    run_in_background(track_request(username))
+    logger.info(f"Streaming data for username: {username}")
+
+    async def stream():
+        # Subscribe before the fetch starts so no event is missed
+        queue = fetch_progress.subscribe(username)
+        body = run_in_background(shared_cache.get_or_compute(
+            data_cache_key(username, DATA_COUNT, "rows", None),
+            lambda: build_data_response(username, DATA_COUNT, DEFAULT_PROJECTION, False),
+            ttl=DATA_CACHE_TTL
+        ))
+        streamed = 0
+        try:
+            while True:
+                next_event = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {next_event, body}, timeout=STREAM_KEEPALIVE_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                )
+                if next_event not in done:
+                    next_event.cancel()
+                    if not done:
+                        yield b": keep-alive\n\n"
+                        continue
+                    break
+                event = next_event.result()
+                streamed += event["event"] == "post"
+                yield sse_event(event["event"], event["data"])
+
+            # Flush events published just before the fetch finished
+            while not queue.empty():
+                event = queue.get_nowait()
+                streamed += event["event"] == "post"
+                yield sse_event(event["event"], event["data"])
+
+            try:
+                posts = body.result()
+            except HTTPException as e:
+                yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+                return
+            except UNAVAILABLE_ERRORS as e:
+                yield sse_event("error", {"status": 503, "detail": str(e)})
+                return
+            except Exception as e:
+                logger.error(f"Error in getData stream: {str(e)}")
+                yield sse_event("error", {"status": 500, "detail": str(e)})
+                return
+
+            if not streamed:
+                yield sse_event("posts", posts)
+            yield sse_event("complete", {"count": len(posts)})
+        finally:
+            fetch_progress.unsubscribe(username, queue)
+            # The body task outlives a disconnected client; retrieve its outcome so it is not reported as unhandled
+            body.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def insights_cache_key(username: str, query: str) -> str:
+    """Shared-cache key for an answer; queries differing only in case or spacing share it"""
+    return f"insights:{username}:{' '.join(query.lower().split())}"
+
+class DataBatchRequest(BaseModel):
+    """Body of /api/v1/getData/batch"""
+    usernames: List[Annotated[str, Field(min_length=1, max_length=30)]] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_USERNAMES
+    )
+    count: int = Field(DATA_COUNT, gt=0, le=1000)
+    format: str = Field("rows", pattern="^(rows|columnar)$")
+
+@app.post("/api/v1/getData/batch")
+async def get_data_batch(request: DataBatchRequest):
+    """
+    Fetch several accounts in one round trip.
+
+    Cached accounts are read with a single shared-cache lookup; the rest are
+    built concurrently like /getData, with at most BATCH_SCRAPE_CONCURRENCY
+    of them scraping Instagram at a time. Returns ``{"results": {username:
+    {"data": ...} | {"error": ..., "status": ...}}}`` so one failing account
+    does not fail the others.
+    """
+    usernames = list(dict.fromkeys(request.usernames))
+    columnar = request.format == "columnar"
+    projection = COLUMNAR_PROJECTION if columnar else DEFAULT_PROJECTION
+    logger.info(f"Fetching batched data for {len(usernames)} usernames, count: {request.count}")
+    for username in usernames:
+        run_in_background(track_request(username))
+
+    keys = {username: data_cache_key(username, request.count, request.format, None) for username in usernames}
     try:
-        logger.info(f"Generating insights for {username} with query: {query}")
-        
-        # Try Langflow first
+        hits = await asyncio.to_thread(shared_cache.get_many, list(keys.values()))
+    except Exception as e:
+        logger.warning(f"Batch cache lookup failed: {str(e)}")
+        hits = {}
+    results: Dict[str, Dict[str, Any]] = {
+        username: {"data": hits[key]} for username, key in keys.items() if key in hits
+    }
+
+    scrape_slots = asyncio.Semaphore(BATCH_SCRAPE_CONCURRENCY)
+
+    async def resolve(username: str):
         try:
-            response = await asyncio.to_thread(
+            body = await shared_cache.get_or_compute(
+                keys[username],
+                lambda: build_data_response(username, request.count, projection, columnar, scrape_slots),
+                ttl=DATA_CACHE_TTL
+            )
+            results[username] = {"data": body}
+        except HTTPException as e:
+            results[username] = {"error": e.detail, "status": e.status_code}
+        except UNAVAILABLE_ERRORS as e:
+            results[username] = {"error": str(e), "status": 503}
+        except Exception as e:
+            logger.error(f"Batched getData failed for {username}: {str(e)}")
+            results[username] = {"error": str(e), "status": 500}
+
+    for username in usernames:
+        if username not in results:
+            try:
+                reject_unavailable_profile(username)
+            except HTTPException as e:
+                results[username] = {"error": e.detail, "status": e.status_code}
+
+    misses = [username for username in usernames if username not in results]
+    await asyncio.gather(*(resolve(username) for username in misses))
+    return ORJSONResponse({"results": {username: results[username] for username in usernames}})
+
+async def answer_routed_query(username: str, routed: RoutedQuery,
+                              load_data: Optional[Callable[[], Awaitable]] = None) -> Optional[Dict[str, Any]]:
+    """Answer a routed question from the stored posts and hashtag index, or None if they cannot"""
+    posts, _ = await (load_data or shared_insights_loader(username))()
+    if posts is None:
+        return None
+    hashtags = None
+    if routed.intent == "top_hashtags":
+        hashtags = await asyncio.to_thread(
+            hashtag_index.top, username, routed.limit or ROUTED_HASHTAG_COUNT, None, routed.metric,
+            1 if routed.metric == "count" else 2
+        )
+    return await asyncio.to_thread(answer_query, routed, posts, hashtags)
+
+async def generate_insights(username: str, query: str,
+                            load_data: Optional[Callable[[], Awaitable]] = None) -> Dict[str, Any]:
+    """
+    Answer a query from the stored posts when possible, otherwise with
+    Langflow, falling back to Gemini over retrieved posts.
+
+    ``load_data`` lets several queries share one load of the user's posts,
+    see shared_insights_loader.
+    """
+    from langflow_fetch import getInsightsFromLangflow
+    clients = APIClients.get_instance()
+
+    # Factual questions (best time, top posts, averages...) need no LLM
+    routed = route_query(query)
+    if routed is not None:
+        with phase("router"):
+            answer = await answer_routed_query(username, routed, load_data)
+        if answer is not None:
+            logger.info(f"Answered insights query locally as {routed.intent}")
+            return answer
+
+    # Try Langflow first
+    try:
+        await clients.wait_ready("langflow")
+        with phase("langflow"):
+            response = await executors["llm"].run(
                 getInsightsFromLangflow,
                 username,
                 query,
-                APIClients.get_instance().langflow_client
+                clients.langflow_client
             )
-            logger.info("Successfully generated insights using Langflow")
-            return response
-        except Exception as e:
-            logger.warning(f"Langflow insights failed, falling back to Gemini: {str(e)}")
-            
-            # Fallback to Gemini
-            data = await get_astra_data(username, DATA_COUNT, COLLECTION_NAME)
-            formatted_data = format_data_as_csv(data)
-            
-            prompt = f"{os.getenv('GEMINI_PROMPT')}\n{query}\n{os.getenv('GEMINI_PROMPT_2')}\n{formatted_data}"
-            
-            response = await asyncio.to_thread(
-                APIClients.get_instance().gemini_client.get_response,
+        logger.info("Successfully generated insights using Langflow")
+        return response
+    except Exception as e:
+        logger.warning(f"Langflow insights failed, falling back to Gemini: {str(e)}")
+        
+        # Fallback to Gemini
+        await clients.wait_ready("gemini")
+        with phase("context"):
+            formatted_data = await build_insights_context(username, query, load_data)
+        
+        prompt = f"{os.getenv('GEMINI_PROMPT')}\n{query}\n{os.getenv('GEMINI_PROMPT_2')}\n{formatted_data}"
+        
+        with phase("gemini"):
+            response = await executors["llm"].run(
+                clients.gemini_client.get_response,
                 prompt
             )
 
-            response = response.text
-            
-            logger.info("Successfully generated insights using Gemini fallback")
-            return {"response": response}
+        # Raising keeps failed answers out of the shared cache
+        if not response.success:
+            raise InsightsError(response.error or response.text)
+        
+        logger.info("Successfully generated insights using Gemini fallback")
+        return {"response": response.text}
+
+@app.get("/api/v1/getInsights")
+async def get_insights(
+    username: str = Query(..., min_length=1, max_length=30),
+    query: str = Query(..., min_length=1)
+):
+    """Get insights endpoint"""
+    try:
+        logger.info(f"Generating insights for {username} with query: {query}")
+        run_in_background(track_request(username))
+        return await shared_cache.get_or_compute(
+            insights_cache_key(username, query),
+            lambda: generate_insights(username, query),
+            ttl=INSIGHTS_CACHE_TTL
+        )
             
+    except UNAVAILABLE_ERRORS:
+        raise
     except Exception as e:
         logger.error(f"Insights generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate insights: {str(e)}")
 
+class InsightsBatchRequest(BaseModel):
+    """Body of /api/v1/getInsights/batch"""
+    username: str = Field(..., min_length=1, max_length=30)
+    queries: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_QUERIES)
+
+@app.post("/api/v1/getInsights/batch")
+async def get_insights_batch(request: InsightsBatchRequest):
+    """
+    Answer several queries for one username.
+
+    The user's posts are loaded once and shared by every query that falls
+    back to Gemini, and at most INSIGHTS_BATCH_CONCURRENCY queries run at a
+    time. Results are streamed as newline-delimited JSON in completion order,
+    one ``{"index", "query", "response"}`` or ``{"index", "query", "error"}``
+    object per query, where ``index`` is the query's position in the request.
+    """
+    username = request.username
+    queries = [query for query in request.queries if query.strip()]
+    if len(queries) != len(request.queries):
+        raise HTTPException(status_code=400, detail="Queries must not be empty")
+    logger.info(f"Generating {len(queries)} batched insights for {username}")
+    run_in_background(track_request(username))
+
+    load_data = shared_insights_loader(username)
+    semaphore = asyncio.Semaphore(INSIGHTS_BATCH_CONCURRENCY)
+    answers = {}
+
+    async def answer(query: str) -> Dict[str, str]:
+        async with semaphore:
+            return await shared_cache.get_or_compute(
+                insights_cache_key(username, query),
+                lambda: generate_insights(username, query, load_data),
+                ttl=INSIGHTS_CACHE_TTL
+            )
+
+    # Repeated questions are answered once
+    for query in queries:
+        key = insights_cache_key(username, query)
+        if key not in answers:
+            answers[key] = asyncio.ensure_future(answer(query))
+
+    async def run_query(index: int, query: str) -> Dict[str, Any]:
+        try:
+            response = await answers[insights_cache_key(username, query)]
+            return {"index": index, "query": query, "response": response}
+        except Exception as e:
+            logger.error(f"Batched insight failed for {username}: {str(e)}")
+            return {"index": index, "query": query, "error": str(e)}
+
+    async def stream():
+        pending = [asyncio.ensure_future(run_query(i, query)) for i, query in enumerate(queries)]
+        try:
+            for result in asyncio.as_completed(pending):
+                yield orjson.dumps(await result) + b"\n"
+        finally:
+            # The client went away; stop any work nobody is waiting for
+            for task in (*pending, *answers.values()):
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 async def shutdown_event():
     """Cleanup on shutdown"""
     try:
-        # Add any cleanup operations here
+        await health_prober.stop()
+        await insight_warmer.stop()
+        executors.shutdown()
         logger.info("Application shutting down")
     except Exception as e:
         logger.error(f"Shutdown error: {str(e)}")
@@ -316,4 +1286,4 @@ app.add_event_handler("shutdown", shutdown_event)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run("main:app" if WEB_CONCURRENCY > 1 else app, host="0.0.0.0", port=8000, workers=WEB_CONCURRENCY)
\ No newline at end of file
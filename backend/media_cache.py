@@ -0,0 +1,131 @@
+import io
+import logging
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it originals are cached as-is
+    Image = None
+
+logger = logging.getLogger("instagram-api")
+
+MEDIA_DIR = "./live_data/media"
+POST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class MediaFetchError(Exception):
+    """Raised when a thumbnail cannot be downloaded or decoded"""
+    pass
+
+
+class MediaCache:
+    """
+    Size-bounded on-disk cache of downsized post thumbnails.
+
+    Files are named after the post id and their mtime doubles as the LRU
+    clock: reads touch the file and eviction removes the oldest files first.
+    That keeps the recency order consistent across worker processes and
+    restarts without a separate index.
+    """
+
+    def __init__(self, root: str = MEDIA_DIR, max_bytes: int = 256 * 1024 * 1024,
+                 thumbnail_size: Tuple[int, int] = (480, 480), fetch_timeout: float = 10.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+        self.fetch_timeout = fetch_timeout
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        os.makedirs(root, exist_ok=True)
+        self._approx_bytes = self._scan_total()
+
+    def _scan_total(self) -> int:
+        return sum(entry.stat().st_size for entry in os.scandir(self.root) if entry.is_file())
+
+    def path_for(self, post_id: str) -> str:
+        if not POST_ID_PATTERN.match(post_id):
+            raise ValueError(f"Invalid post id: {post_id}")
+        return os.path.join(self.root, f"{post_id}.jpg")
+
+    def get(self, post_id: str) -> Optional[str]:
+        """Return the cached thumbnail path for ``post_id`` and mark it recently used"""
+        path = self.path_for(post_id)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _downsize(self, data: bytes) -> bytes:
+        if Image is None:
+            return data
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = image.convert("RGB")
+                image.thumbnail(self.thumbnail_size)
+                output = io.BytesIO()
+                image.save(output, format="JPEG", quality=80, optimize=True)
+                return output.getvalue()
+        except Exception as e:
+            raise MediaFetchError(f"Could not decode image: {str(e)}")
+
+    def fetch(self, post_id: str, url: str) -> str:
+        """Download, downsize and store the thumbnail for ``post_id``; returns its path"""
+        path = self.path_for(post_id)
+        if os.path.exists(path):
+            return path
+        try:
+            response = self._session.get(url, timeout=self.fetch_timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise MediaFetchError(f"Failed to download media for {post_id}: {str(e)}")
+
+        thumbnail = self._downsize(response.content)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, "wb") as f:
+            f.write(thumbnail)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._approx_bytes += len(thumbnail)
+            over_budget = self._approx_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+        return path
+
+    def evict(self):
+        """Remove least recently used thumbnails until the cache fits its budget"""
+        with self._lock:
+            entries = [entry for entry in os.scandir(self.root)
+                       if entry.is_file() and entry.name.endswith(".jpg")]
+            stats = sorted(((entry.stat(), entry.path) for entry in entries), key=lambda item: item[0].st_mtime)
+            total = sum(stat.st_size for stat, _ in stats)
+            removed = 0
+            for stat, path in stats:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= stat.st_size
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            self._approx_bytes = total
+        if removed:
+            logger.info(f"Evicted {removed} thumbnails from media cache")
+
+    def prefetch(self, urls: Dict[str, str]) -> int:
+        """Fetch thumbnails for a mapping of post id to source URL; returns the number stored"""
+        stored = 0
+        for post_id, url in urls.items():
+            try:
+                self.fetch(post_id, url)
+                stored += 1
+            except (MediaFetchError, ValueError) as e:
+                logger.warning(str(e))
+        return stored
@@ -0,0 +1,72 @@
+import base64
+import json
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class InvalidCursorError(Exception):
+    """Raised when a pagination cursor cannot be decoded or does not match the request"""
+    pass
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Encode pagination state as an opaque, URL-safe cursor string"""
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursorError(f"Malformed cursor: {str(e)}")
+    if not isinstance(state, dict):
+        raise InvalidCursorError("Malformed cursor")
+    return state
+
+
+def fetch_page(collection, filter: Dict[str, Any], sort: Dict[str, Any],
+               projection: Dict[str, bool], page_size: int,
+               page_state: Optional[str] = None,
+               offset: int = 0) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Read one page of ``page_size`` documents using AstraDB page state.
+
+    The Data API decides its own page size, so a client page may end part way
+    through a server page. The returned resume point therefore pairs the page
+    state that produced the server page with an offset into it. At most one
+    server page beyond ``page_size`` documents is held at a time.
+
+    Args:
+        collection: AstraDB collection
+        filter: Find filter
+        sort: Find sort
+        projection: Find projection
+        page_size: Number of documents to return
+        page_state: AstraDB page state to resume from, or None to start over
+        offset: Number of documents to skip in the first server page
+
+    Returns:
+        tuple: The documents, and the resume point (``page_state``, ``offset``)
+        or None when the results are exhausted
+    """
+    items: List[Dict[str, Any]] = []
+    while True:
+        find_kwargs = {"filter": filter, "sort": sort, "projection": projection}
+        if page_state is not None:
+            find_kwargs["initial_page_state"] = page_state
+        page = collection.find(**find_kwargs).fetch_next_page()
+
+        results = page.results[offset:]
+        needed = page_size - len(items)
+        if len(results) > needed:
+            items.extend(results[:needed])
+            return items, {"page_state": page_state, "offset": offset + needed}
+
+        items.extend(results)
+        if page.next_page_state is None:
+            return items, None
+        page_state, offset = page.next_page_state, 0
+        if len(items) == page_size:
+            return items, {"page_state": page_state, "offset": 0}
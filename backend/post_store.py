@@ -0,0 +1,268 @@
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from enrichment import TIMESTAMP_FORMAT, compute_derived_features, timestamp_to_epoch
+from snapshot_store import TYPE_CODES, TYPE_NAMES, UNKNOWN_TYPE
+
+logger = logging.getLogger("instagram-api")
+
+# Metadata fields held in dedicated columns; anything else is kept per post in ``extras``
+KNOWN_FIELDS = frozenset({
+    "likes", "comments", "views", "timestamp", "hashtags", "location", "music",
+    "post_id", "type", "urls", "caption", "username", "derived"
+})
+# Derived features stored at ingest (see enrichment.DERIVED_FIELDS) and their column types;
+# a post hour or weekday of -1 means the post had no timestamp
+DERIVED_DTYPES = {
+    "engagement_total": np.int64,
+    "engagement_rate": np.float64,
+    "post_hour": np.int8,
+    "post_weekday": np.int8,
+    "hashtag_count": np.int32,
+    "caption_length": np.int32,
+    "media_count": np.int32,
+}
+
+def _intern(value: Optional[str]) -> str:
+    return sys.intern(value) if value else ""
+
+
+class PostColumns:
+    """
+    Compact, read-only in-memory form of one account's posts, newest first.
+
+    Counts, epoch-second timestamps, type codes and the derived features
+    stored at ingest are NumPy arrays. Hashtags, URLs, locations and music
+    titles are interned tuples and strings, so values repeated across posts
+    are stored once, and the username is stored once instead of on every
+    post. Consumers read the arrays directly; full documents are only built
+    when a response needs them. A timestamp of 0 means the post had none.
+    """
+
+    __slots__ = (
+        "username", "ids", "post_ids", "captions", "hashtags", "urls", "locations", "music", "extras",
+        "likes", "comments", "views", "timestamp", "type", *DERIVED_DTYPES, "_positions"
+    )
+
+    def __init__(self, username: str, ids: List[Any], post_ids: List[str], captions: List[str],
+                 hashtags: List[Tuple[str, ...]], urls: List[Tuple[str, ...]], locations: List[str],
+                 music: List[str], extras: List[Optional[Dict[str, Any]]], likes: np.ndarray,
+                 comments: np.ndarray, views: np.ndarray, timestamp: np.ndarray, type: np.ndarray,
+                 derived: Dict[str, np.ndarray]):
+        self.username = username
+        self.ids = ids
+        self.post_ids = post_ids
+        self.captions = captions
+        self.hashtags = hashtags
+        self.urls = urls
+        self.locations = locations
+        self.music = music
+        self.extras = extras
+        self.likes = likes
+        self.comments = comments
+        self.views = views
+        self.timestamp = timestamp
+        self.type = type
+        for name in DERIVED_DTYPES:
+            setattr(self, name, derived[name])
+        self._positions = None
+        for name in self.numeric_columns():
+            array = getattr(self, name)
+            # Memory-mapped columns are opened read-only already
+            if array.flags.writeable:
+                array.flags.writeable = False
+
+    @staticmethod
+    def numeric_columns() -> Tuple[str, ...]:
+        """Names of the array attributes"""
+        return ("likes", "comments", "views", "timestamp", "type", *DERIVED_DTYPES)
+
+    @classmethod
+    def from_documents(cls, username: str, docs: Iterable[Dict[str, Any]]) -> "PostColumns":
+        """
+        Build the compact form of ``docs`` (documents as stored in AstraDB), newest post first.
+
+        Derived features are taken from ``metadata.derived``; they are only
+        computed for documents stored before ingest-time enrichment existed.
+        """
+        docs = list(docs)
+        epochs = np.fromiter(
+            (timestamp_to_epoch(doc.get("metadata", {}).get("timestamp")) for doc in docs),
+            dtype=np.int64, count=len(docs)
+        )
+        # Stable, so posts sharing a timestamp keep their relative order
+        order = np.argsort(-epochs, kind="stable")
+
+        ids, post_ids, captions, hashtags, urls, locations, music, extras = [], [], [], [], [], [], [], []
+        likes = np.zeros(len(docs), dtype=np.int64)
+        comments = np.zeros(len(docs), dtype=np.int64)
+        views = np.zeros(len(docs), dtype=np.int64)
+        types = np.zeros(len(docs), dtype=np.int8)
+        derived = {name: np.zeros(len(docs), dtype=dtype) for name, dtype in DERIVED_DTYPES.items()}
+        for i, position in enumerate(order.tolist()):
+            doc = docs[position]
+            metadata = doc.get("metadata", {})
+            ids.append(doc.get("_id"))
+            post_ids.append(metadata.get("post_id") or "")
+            captions.append(metadata.get("caption") or "")
+            hashtags.append(tuple(_intern(tag) for tag in metadata.get("hashtags") or ()))
+            urls.append(tuple(metadata.get("urls") or ()))
+            locations.append(_intern(metadata.get("location")))
+            music.append(_intern(metadata.get("music")))
+            likes[i] = metadata.get("likes") or 0
+            comments[i] = metadata.get("comments") or 0
+            views[i] = metadata.get("views") or 0
+            types[i] = TYPE_CODES.get(metadata.get("type"), UNKNOWN_TYPE)
+            features = metadata.get("derived") or compute_derived_features(metadata)
+            for name, column in derived.items():
+                value = features.get(name)
+                column[i] = -1 if value is None else value
+
+            extra = {key: value for key, value in metadata.items() if key not in KNOWN_FIELDS}
+            # Keep timestamps and types the columns cannot represent
+            if metadata.get("timestamp") and not epochs[position]:
+                extra["timestamp"] = metadata["timestamp"]
+            if types[i] == UNKNOWN_TYPE and metadata.get("type"):
+                extra["type"] = metadata["type"]
+            extras.append(extra or None)
+
+        return cls(username, ids, post_ids, captions, hashtags, urls, locations, music, extras,
+                   likes, comments, views, epochs[order], types, derived)
+
+    @classmethod
+    def from_snapshot(cls, username: str, arrays: Dict[str, np.ndarray], strings: Dict[str, List[Any]]) -> "PostColumns":
+        """Build from SnapshotStore.load_columns output, using the memory-mapped arrays as they are"""
+        return cls(
+            username, strings["ids"], strings["post_ids"], strings["captions"],
+            [tuple(_intern(tag) for tag in tags) for tags in strings["hashtags"]],
+            [tuple(urls) for urls in strings["urls"]],
+            [_intern(location) for location in strings["locations"]],
+            [_intern(title) for title in strings["music"]],
+            strings["extras"],
+            arrays["likes"], arrays["comments"], arrays["views"], arrays["timestamp"], arrays["type"],
+            {name: arrays[name] for name in DERIVED_DTYPES}
+        )
+
+    def __len__(self) -> int:
+        return len(self.post_ids)
+
+    def columns(self, count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Numeric columns by name (likes, comments, views, timestamp, type), without copying"""
+        limit = slice(None, count)
+        return {
+            "likes": self.likes[limit],
+            "comments": self.comments[limit],
+            "views": self.views[limit],
+            "timestamp": self.timestamp[limit],
+            "type": self.type[limit],
+        }
+
+    def type_name(self, i: int) -> str:
+        extra = self.extras[i]
+        if extra and "type" in extra:
+            return extra["type"]
+        return TYPE_NAMES.get(int(self.type[i]), "")
+
+    def timestamp_string(self, i: int) -> str:
+        """The post's timestamp in the scraper's format, or "" if it had none"""
+        extra = self.extras[i]
+        if extra and "timestamp" in extra:
+            return extra["timestamp"]
+        epoch = int(self.timestamp[i])
+        if not epoch:
+            return ""
+        return datetime.fromtimestamp(epoch, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+    def derived(self, i: int) -> Dict[str, Any]:
+        """Derived features of post ``i`` as stored at ingest"""
+        hour, weekday = int(self.post_hour[i]), int(self.post_weekday[i])
+        return {
+            "engagement_total": int(self.engagement_total[i]),
+            "engagement_rate": float(self.engagement_rate[i]),
+            "post_hour": hour if hour >= 0 else None,
+            "post_weekday": weekday if weekday >= 0 else None,
+            "hashtag_count": int(self.hashtag_count[i]),
+            "caption_length": int(self.caption_length[i]),
+            "media_count": int(self.media_count[i]),
+        }
+
+    def metadata(self, i: int) -> Dict[str, Any]:
+        """Rebuild the ``metadata`` block of post ``i``"""
+        metadata = {
+            "likes": int(self.likes[i]),
+            "comments": int(self.comments[i]),
+            "views": int(self.views[i]),
+            "timestamp": self.timestamp_string(i),
+            "hashtags": list(self.hashtags[i]),
+            "location": self.locations[i],
+            "music": self.music[i],
+            "post_id": self.post_ids[i],
+            "type": self.type_name(i),
+            "urls": list(self.urls[i]),
+            "caption": self.captions[i],
+            "username": self.username,
+            "derived": self.derived(i),
+        }
+        extra = self.extras[i]
+        if extra:
+            metadata.update(extra)
+        return metadata
+
+    def documents(self, count: Optional[int] = None, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Materialize up to ``count`` posts as ``{"_id", "metadata"}`` documents.
+
+        Args:
+            count: Number of posts, newest first; None returns all
+            fields: Metadata fields to include; None includes all of them
+        """
+        documents = []
+        for i in range(len(self) if count is None else min(count, len(self))):
+            metadata = self.metadata(i)
+            if fields is not None:
+                metadata = {field: metadata.get(field) for field in fields}
+            documents.append({"_id": self.ids[i], "metadata": metadata})
+        return documents
+
+    def positions(self, post_ids: Iterable[str]) -> List[int]:
+        """Positions of the given post ids, skipping ids not in this set"""
+        if self._positions is None:
+            self._positions = {post_id: i for i, post_id in enumerate(self.post_ids)}
+        return [self._positions[post_id] for post_id in post_ids if post_id in self._positions]
+
+
+class HotPostStore:
+    """
+    Per-process LRU of PostColumns for the most recently read accounts.
+
+    Entries are tagged with the version of the snapshot they were built from
+    (its write time), so an account re-scraped by another worker is reloaded
+    rather than served stale.
+    """
+
+    def __init__(self, max_accounts: int = 64):
+        self.max_accounts = max_accounts
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, PostColumns]]" = OrderedDict()
+
+    def get(self, username: str, version: float) -> Optional[PostColumns]:
+        """The posts of ``username`` if they were built from snapshot ``version``"""
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(username)
+            return entry[1]
+
+    def put(self, posts: PostColumns, version: float):
+        with self._lock:
+            self._entries[posts.username] = (version, posts)
+            self._entries.move_to_end(posts.username)
+            while len(self._entries) > self.max_accounts:
+                self._entries.popitem(last=False)
@@ -0,0 +1,105 @@
+import logging
+from typing import Any, Dict, Optional
+
+from shared_cache import SharedCache
+
+logger = logging.getLogger("instagram-api")
+
+NOT_FOUND = "not_found"
+PRIVATE = "private"
+
+
+class ProfileUnavailableError(Exception):
+    """Raised when an account does not exist or is private, so fetching it is pointless"""
+
+    def __init__(self, username: str, reason: str):
+        super().__init__(f"Profile {username} is unavailable: {reason.replace('_', ' ')}")
+        self.username = username
+        self.reason = reason
+
+
+def is_definitely_missing(error: Exception) -> bool:
+    """Whether an Instaloader ProfileNotExistsException reports an account that does not exist"""
+    return "does not exist" in str(error)
+
+
+class ProfileCache:
+    """
+    Resolved Instagram profile metadata, shared by every worker through the shared cache.
+
+    Found profiles are stored as their user id, post count and privacy for
+    ``ttl`` seconds, which saves the profile page lookup the next time the
+    account is resolved. Missing and private accounts are stored for
+    ``negative_ttl`` seconds and rejected without touching Instagram.
+    """
+
+    def __init__(self, cache: SharedCache, ttl: float = 6 * 3600.0, negative_ttl: float = 3600.0):
+        self.cache = cache
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return f"profile:{username.lower()}"
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        """The cached entry for ``username``: ``status`` plus, when found, ``userid``, ``mediacount`` and ``is_private``"""
+        return self.cache.get(self._key(username))
+
+    def check(self, username: str):
+        """
+        Reject usernames known to be missing or private.
+
+        Raises:
+            ProfileUnavailableError: If a negative entry is cached
+        """
+        entry = self.get(username)
+        if entry is not None and entry["status"] != "ok":
+            raise ProfileUnavailableError(username, entry["status"])
+
+    def resolve(self, context, username: str):
+        """
+        Return a fully loaded Instaloader Profile bound to ``context``.
+
+        The profile's metadata, first page of posts included, is always
+        fetched by this call, so a Profile rebuilt from its node during the
+        same fetch needs no further request. A cached user id skips the
+        profile page lookup that otherwise precedes it.
+
+        Raises:
+            ProfileUnavailableError: If the account does not exist or is private
+            instaloader.exceptions.ProfileNotExistsException: If the profile exists but could not be loaded
+        """
+        import instaloader
+
+        entry = self.get(username)
+        if entry is not None and entry["status"] != "ok":
+            raise ProfileUnavailableError(username, entry["status"])
+
+        try:
+            if entry is not None:
+                profile = instaloader.Profile(context, {"username": username, "id": entry["userid"]})
+            else:
+                profile = instaloader.Profile.from_username(context, username)
+            profile._obtain_metadata()
+        except instaloader.exceptions.ProfileNotExistsException as e:
+            # Instaloader also raises this when a profile "seems to exist, but could
+            # not be loaded"; only a definite miss is worth remembering
+            if not is_definitely_missing(e):
+                raise
+            self.cache.set(self._key(username), {"status": NOT_FOUND}, ttl=self.negative_ttl)
+            raise ProfileUnavailableError(username, NOT_FOUND)
+
+        # Pool sessions are anonymous, so a private account's posts cannot be read
+        if profile.is_private:
+            self.cache.set(self._key(username), {"status": PRIVATE}, ttl=self.negative_ttl)
+            raise ProfileUnavailableError(username, PRIVATE)
+
+        if entry is None:
+            self.cache.set(self._key(username), {
+                "status": "ok",
+                "userid": profile.userid,
+                "mediacount": profile.mediacount,
+                "is_private": False,
+            }, ttl=self.ttl)
+        return profile
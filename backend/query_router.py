@@ -0,0 +1,331 @@
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from post_store import PostColumns
+from snapshot_store import TYPE_CODES, TYPE_NAMES
+
+logger = logging.getLogger("instagram-api")
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+# Hours and weekdays backed by fewer posts than this are not recommended
+MIN_BUCKET_POSTS = 2
+
+# Posts listed by "top post" answers when the question gives no number, and the most listed
+TOP_POSTS = 3
+MAX_LIMIT = 50
+
+# Questions asking for judgement rather than a number always go to the LLM
+OPEN_ENDED = re.compile(
+    r"\b(why|improve|suggest|suggestions?|recommend|recommendations?|advice|advise|strateg(?:y|ies)|"
+    r"explain|analy[sz]e|analysis|ideas?|write|predict|forecast|should i (?:do|change|try|stop))\b"
+)
+# Leading courtesies and trailing punctuation stripped before matching the templates
+PREAMBLE = re.compile(r"^(?:please |(?:can|could) you (?:please )?(?:tell|show) me |tell me |show me )")
+TRAILING = re.compile(r"[\s?!.]+$")
+
+# Fragments of the question templates below
+_TYPE = r"(?:posts?|reels?|videos?|images?|photos?|pictures?|pics?|carousels?|albums?|content)"
+_MEDIA = r"(?:reels?|videos?|images?|photos?|pictures?|carousels?|albums?)"
+_METRIC = r"(?:likes|comments|views|plays|engagement)"
+_RANKED = r"(?:top|best|(?:top|best|highest)[- ]performing|most (?:liked|commented(?: on)?|viewed|played|engaging|popular))"
+_BY_METRIC = (
+    rf"(?: (?:by|for|in terms of|based on|with the most|for the most|for more|to get (?:the most|more)) "
+    rf"(?:the )?(?:number of )?{_METRIC})?"
+)
+_WHAT = r"(?:what|which)(?:'s| is| are| was| were)?"
+_MY = r"(?:my |the |our )?"
+_LIMIT = r"(?: (?P<limit>\d{1,3}))?"
+
+# Whole-question templates per intent, tried in order; a question must match one of them
+# entirely, so one that merely mentions a matching phrase goes to the LLM instead.
+# Each entry is (intent, template, metric when the question names none).
+TEMPLATES = [
+    ("top_hashtags", re.compile(
+        rf"(?:{_WHAT} )?{_MY}(?:top(?: (?P<limit>\d{{1,3}}))? )?most (?:used|common|frequent|frequently used|often used) hashtags?|"
+        rf"(?:{_WHAT} )?{_MY}hashtags? (?:that )?(?:i|we) use (?:the )?most(?: often)?|"
+        r"(?:what|which) hashtags? do (?:i|we) use (?:the )?most(?: often)?"
+    ), "count"),
+    ("top_hashtags", re.compile(
+        rf"(?:{_WHAT} )?{_MY}{_RANKED}{_LIMIT} hashtags?{_BY_METRIC}|"
+        rf"(?:what|which) hashtags? (?:perform|performs|work|works|do|does) (?:the )?best{_BY_METRIC}|"
+        rf"(?:what|which) hashtags? (?:get|gets|got) (?:the )?most {_METRIC}"
+    ), "likes"),
+    ("best_content_type", re.compile(
+        rf"(?:{_WHAT} )?{_MY}(?:best[- ]performing |top[- ]performing )?(?:content|post|media) (?:type|format)s?{_BY_METRIC}|"
+        rf"(?:what|which) (?:content type|type of (?:content|posts?)|kind of (?:content|posts?)|post type|format)s? "
+        rf"(?:performs?|works?|does|do|gets?|got|is|are) (?:the )?(?:best|better|most){_BY_METRIC}|"
+        rf"(?:(?:what|which) performs? (?:the )?(?:best|better)[,:]? |(?:do|does) )?(?:my )?{_MEDIA}(?:,? (?:or|vs\.?|versus) (?:my )?{_MEDIA})+"
+        rf"(?: perform(?:s|ance)?(?: (?:the )?(?:best|better))?)?{_BY_METRIC}"
+    ), "engagement"),
+    ("best_time", re.compile(
+        rf"(?:{_WHAT} )?{_MY}(?:best|optimal|ideal|top) (?:times?|hours?|days?|days? of the week|time of (?:the )?day)"
+        rf"(?: (?:and|or) (?:times?|hours?|days?))? (?:to|for) (?:post|posting|publish|publishing)"
+        rf"(?: (?:a |my )?{_TYPE})?{_BY_METRIC}|"
+        rf"when (?:should|do|can|is the best time for) (?:i|we) (?:post|publish)(?: (?:my )?{_TYPE})?{_BY_METRIC}"
+    ), "engagement"),
+    ("average", re.compile(
+        rf"(?:{_WHAT} |how many )?{_MY}(?:average|avg|mean|typical) (?:number of )?{_METRIC}"
+        rf"(?: (?:per|on|for) (?:a |an |each |my )?{_TYPE})?|"
+        rf"how many {_METRIC} do (?:my )?{_TYPE} (?:get|receive|have) on average"
+    ), "likes"),
+    ("top_post", re.compile(
+        rf"(?:{_WHAT} |(?:show|list|give|find)(?: me)? )?{_MY}{_RANKED}{_LIMIT} {_TYPE}{_BY_METRIC}|"
+        rf"(?:what|which) {_TYPE} (?:got|gets|has|had|received|performed|did) (?:the )?(?:most|highest|best)"
+        rf"(?: {_METRIC})?"
+    ), "engagement"),
+    ("posting_frequency", re.compile(
+        rf"how (?:often|frequently) do (?:i|we) (?:post|publish)(?: {_TYPE})?|"
+        rf"how many {_TYPE} do (?:i|we) (?:post|publish|make) (?:per|a|each|every) (?:day|week|month)|"
+        rf"(?:{_WHAT} )?{_MY}posting (?:frequency|rate|cadence|schedule)"
+    ), "engagement"),
+]
+
+METRICS = (
+    ("likes", re.compile(r"\blik(?:e|es|ed)\b")),
+    ("comments", re.compile(r"\bcomment(?:s|ed)?\b")),
+    ("views", re.compile(r"\b(views?|viewed|plays?|played)\b")),
+    ("engagement", re.compile(r"\bengag\w*")),
+)
+POST_TYPES = (
+    ("Reel", re.compile(r"\b(reels?|videos?)\b")),
+    ("Image", re.compile(r"\b(images?|photos?|pictures?|pics?)\b")),
+    ("Carousel", re.compile(r"\b(carousels?|albums?|slides?)\b")),
+)
+
+
+@dataclass(frozen=True)
+class RoutedQuery:
+    """A question that can be answered exactly from the stored posts"""
+    intent: str
+    metric: str = "engagement"
+    post_type: Optional[str] = None
+    limit: Optional[int] = None
+
+
+def route_query(query: str) -> Optional[RoutedQuery]:
+    """
+    Classify an insights question.
+
+    Only questions that match one of the TEMPLATES as a whole are routed;
+    anything else, including questions that merely contain a routable
+    phrase, is left to the LLM.
+
+    Returns:
+        RoutedQuery: For questions answerable from stored metadata, or None
+        for open-ended questions that need the LLM
+    """
+    text = " ".join(query.lower().split())
+    if OPEN_ENDED.search(text):
+        return None
+    text = TRAILING.sub("", PREAMBLE.sub("", text))
+
+    for intent, template, default_metric in TEMPLATES:
+        match = template.fullmatch(text)
+        if match is None:
+            continue
+        limit = match.groupdict().get("limit")
+        limit = min(int(limit), MAX_LIMIT) if limit else None
+        if limit == 0:
+            return None
+        if intent == "top_hashtags":
+            return RoutedQuery(intent, default_metric, limit=limit)
+        metric = next((name for name, pattern in METRICS if pattern.search(text)), default_metric)
+        # Content type questions compare the types, so they are not filtered by one
+        post_type = None if intent == "best_content_type" else next(
+            (name for name, pattern in POST_TYPES if pattern.search(text)), None
+        )
+        return RoutedQuery(intent, metric, post_type, limit)
+    return None
+
+
+def _metric_values(posts: PostColumns, metric: str) -> np.ndarray:
+    if metric == "engagement":
+        return posts.engagement_total
+    return getattr(posts, metric)
+
+
+def _type_label(post_type: Optional[str]) -> str:
+    return f"{post_type.lower()}s" if post_type else "posts"
+
+
+def _select(posts: PostColumns, post_type: Optional[str]) -> np.ndarray:
+    """Positions of the posts of ``post_type``, or of all posts"""
+    if post_type is None:
+        return np.arange(len(posts))
+    return np.flatnonzero(posts.type == TYPE_CODES[post_type])
+
+
+def _group_averages(keys: np.ndarray, values: np.ndarray, size: int) -> List[Dict[str, Any]]:
+    """Post count and mean value per key in range(size), best mean first; empty keys are left out"""
+    counts = np.bincount(keys, minlength=size)
+    sums = np.bincount(keys, weights=values, minlength=size)
+    return sorted(
+        ({"key": key, "posts": int(counts[key]), "average": round(float(sums[key] / counts[key]), 2)}
+         for key in np.flatnonzero(counts).tolist()),
+        key=lambda entry: entry["average"], reverse=True
+    )
+
+
+def _best_time(posts: PostColumns, selected: np.ndarray, routed: RoutedQuery) -> Optional[Dict[str, Any]]:
+    selected = selected[posts.post_hour[selected] >= 0]
+    if not len(selected):
+        return None
+    values = _metric_values(posts, routed.metric)[selected]
+
+    def ranked(keys: np.ndarray, size: int) -> List[Dict[str, Any]]:
+        groups = _group_averages(keys.astype(np.int64), values, size)
+        # Fall back to single-post buckets for accounts with very few posts
+        return [entry for entry in groups if entry["posts"] >= MIN_BUCKET_POSTS] or groups
+
+    best_hours = ranked(posts.post_hour[selected], 24)
+    best_days = ranked(posts.post_weekday[selected], 7)
+    lines = [f"Based on {len(selected)} {_type_label(routed.post_type)}, "
+             f"ranked by average {routed.metric} (times are UTC):", "", "**Best hours to post**"]
+    lines += [f"- {entry['key']:02d}:00 – {entry['average']:,.0f} {routed.metric} on average ({entry['posts']} posts)"
+              for entry in best_hours[:3]]
+    lines += ["", "**Best days to post**"]
+    lines += [f"- {WEEKDAYS[entry['key']]} – {entry['average']:,.0f} {routed.metric} on average ({entry['posts']} posts)"
+              for entry in best_days[:3]]
+    return {
+        "response": "\n".join(lines),
+        "data": {
+            "hours": [{"hour": e["key"], "posts": e["posts"], "average": e["average"]} for e in best_hours],
+            "weekdays": [{"weekday": WEEKDAYS[e["key"]], "posts": e["posts"], "average": e["average"]} for e in best_days],
+        },
+    }
+
+
+def _top_post(posts: PostColumns, selected: np.ndarray, routed: RoutedQuery) -> Optional[Dict[str, Any]]:
+    if not len(selected):
+        return None
+    # Stable, so ties go to the newest post
+    order = np.argsort(-_metric_values(posts, routed.metric)[selected], kind="stable")
+    top = []
+    limit = routed.limit or TOP_POSTS
+    lines = [f"Your top {min(limit, len(selected))} {_type_label(routed.post_type)} by {routed.metric}:", ""]
+    for rank, i in enumerate(selected[order[:limit]].tolist(), 1):
+        caption = posts.captions[i].strip().replace("\n", " ")
+        if len(caption) > 80:
+            caption = caption[:77] + "..."
+        post = {
+            "post_id": posts.post_ids[i],
+            "type": posts.type_name(i),
+            "timestamp": posts.timestamp_string(i),
+            "likes": int(posts.likes[i]),
+            "comments": int(posts.comments[i]),
+            "views": int(posts.views[i]),
+        }
+        top.append(post)
+        lines.append(
+            f"{rank}. {post['type'] or 'Post'} from {post['timestamp'] or 'an unknown date'} – "
+            f"{post['likes']:,} likes, {post['comments']:,} comments"
+            + (f", {post['views']:,} views" if post["views"] else "")
+            + (f"\n   _{caption}_" if caption else "")
+        )
+    return {"response": "\n".join(lines), "data": {"posts": top}}
+
+
+def _averages_by_type(posts: PostColumns, selected: np.ndarray, metric: str) -> List[Dict[str, Any]]:
+    # Shift the codes so UNKNOWN_TYPE (-1) can be counted by bincount
+    groups = _group_averages(posts.type[selected].astype(np.int64) + 1,
+                             _metric_values(posts, metric)[selected], len(TYPE_NAMES) + 1)
+    return [{"type": TYPE_NAMES.get(entry["key"] - 1, "Other"), "posts": entry["posts"], "average": entry["average"]}
+            for entry in groups]
+
+
+def _average(posts: PostColumns, selected: np.ndarray, routed: RoutedQuery) -> Optional[Dict[str, Any]]:
+    if not len(selected):
+        return None
+    overall = float(_metric_values(posts, routed.metric)[selected].mean())
+    by_type = _averages_by_type(posts, selected, routed.metric)
+    lines = [f"Average {routed.metric} per {_type_label(routed.post_type)[:-1]}: **{overall:,.1f}** "
+             f"(across {len(selected)} {_type_label(routed.post_type)})"]
+    if routed.post_type is None and len(by_type) > 1:
+        lines += [""] + [f"- {entry['type']}: {entry['average']:,.1f} ({entry['posts']} posts)"
+                         for entry in sorted(by_type, key=lambda entry: entry["type"])]
+    return {
+        "response": "\n".join(lines),
+        "data": {
+            "metric": routed.metric,
+            "average": round(overall, 2),
+            "by_type": {entry["type"]: {"posts": entry["posts"], "average": entry["average"]} for entry in by_type},
+        },
+    }
+
+
+def _best_content_type(posts: PostColumns, selected: np.ndarray, routed: RoutedQuery) -> Optional[Dict[str, Any]]:
+    if not len(selected):
+        return None
+    ranked = _averages_by_type(posts, selected, routed.metric)
+    lines = [f"**{ranked[0]['type']}** performs best, with {ranked[0]['average']:,.0f} {routed.metric} on average.", ""]
+    lines += [f"- {entry['type']}: {entry['average']:,.0f} average {routed.metric} ({entry['posts']} posts)" for entry in ranked]
+    return {"response": "\n".join(lines), "data": {"metric": routed.metric, "types": ranked}}
+
+
+def _posting_frequency(posts: PostColumns, selected: np.ndarray, routed: RoutedQuery) -> Optional[Dict[str, Any]]:
+    timestamps = posts.timestamp[selected]
+    timestamps = timestamps[timestamps != 0]
+    if not len(timestamps):
+        return None
+    first = datetime.fromtimestamp(int(timestamps.min()), timezone.utc).replace(tzinfo=None)
+    last = datetime.fromtimestamp(int(timestamps.max()), timezone.utc).replace(tzinfo=None)
+    span_days = max((last - first) / timedelta(days=1), 1.0)
+    per_week = len(timestamps) / span_days * 7
+    label = _type_label(routed.post_type)
+    response = (f"You published {len(timestamps)} {label} between {first:%Y-%m-%d} and {last:%Y-%m-%d}, "
+                f"about **{per_week:.1f} {label} per week**.")
+    return {
+        "response": response,
+        "data": {"posts": len(timestamps), "first": first.isoformat(), "last": last.isoformat(),
+                 "per_week": round(per_week, 2)},
+    }
+
+
+def _top_hashtags(hashtags: List[Dict[str, Any]], routed: RoutedQuery) -> Optional[Dict[str, Any]]:
+    if not hashtags:
+        return None
+    if routed.metric == "count":
+        lines = ["Your most used hashtags:", ""]
+        lines += [f"- #{h['hashtag']} – {h['post_count']} posts, {h['mean_likes']:,.0f} likes on average" for h in hashtags]
+    else:
+        lines = ["Your best performing hashtags by average likes:", ""]
+        lines += [f"- #{h['hashtag']} – {h['mean_likes']:,.0f} likes on average across {h['post_count']} posts"
+                  for h in hashtags]
+    return {"response": "\n".join(lines), "data": {"hashtags": hashtags}}
+
+
+ANSWERS = {
+    "best_time": _best_time,
+    "top_post": _top_post,
+    "average": _average,
+    "best_content_type": _best_content_type,
+    "posting_frequency": _posting_frequency,
+}
+
+
+def answer_query(routed: RoutedQuery, posts: PostColumns,
+                 hashtags: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Answer a routed question from the user's stored posts.
+
+    Args:
+        routed: Result of route_query
+        posts: The user's posts
+        hashtags: Hashtag statistics from the hashtag index, for "top_hashtags"
+
+    Returns:
+        dict: ``{"response", "intent", "data"}`` with a Markdown answer and
+        the numbers behind it, or None if the posts cannot answer it
+    """
+    if routed.intent == "top_hashtags":
+        answer = _top_hashtags(hashtags or [], routed)
+    else:
+        answer = ANSWERS[routed.intent](posts, _select(posts, routed.post_type), routed)
+    if answer is None:
+        return None
+    return {"response": answer["response"], "intent": routed.intent, "data": answer["data"]}
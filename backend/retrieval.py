@@ -0,0 +1,236 @@
+import logging
+import os
+import re
+import threading
+import zipfile
+import zlib
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+from post_store import PostColumns
+from snapshot_store import TYPE_NAMES
+
+logger = logging.getLogger("instagram-api")
+
+EMBEDDING_DIM = 512
+HASHTAG_WEIGHT = 2.0
+# Above this many posts a coarse IVF index replaces brute-force search
+ANN_THRESHOLD = 5000
+ANN_PROBES = 8
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE = 20000
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _token_features(text: str) -> List[str]:
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    bigrams = [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+    return tokens + bigrams
+
+
+def hash_embed(texts: List[str], hashtags: Optional[List[List[str]]] = None,
+               dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Embed texts with the signed hashing trick over word unigrams and bigrams.
+
+    Hashing uses crc32 rather than ``hash()`` so vectors are stable across
+    processes and restarts. Rows are L2-normalized, so a dot product is the
+    cosine similarity.
+
+    Args:
+        texts: Captions or queries to embed
+        hashtags: Optional hashtags per text, weighted more heavily than words
+        dim: Embedding dimensionality
+
+    Returns:
+        np.ndarray: float32 matrix of shape (len(texts), dim)
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        features = [(feature, 1.0) for feature in _token_features(text or "")]
+        if hashtags is not None:
+            features += [(tag.lower(), HASHTAG_WEIGHT) for tag in hashtags[row] or [] if tag]
+        for feature, weight in features:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vectors[row, digest % dim] += sign * weight
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _post_text(doc: Dict[str, Any]) -> str:
+    metadata = doc.get("metadata", {})
+    hashtags = " ".join(metadata.get("hashtags") or [])
+    return f"{metadata.get('caption', '')} {hashtags} {metadata.get('type', '')}"
+
+
+class PostIndex:
+    """
+    Vector index over one user's posts.
+
+    Small sets are searched brute force with a single matrix-vector product.
+    Sets larger than ANN_THRESHOLD get an inverted-file index: posts are
+    clustered with spherical k-means and a query only scores the posts in the
+    ANN_PROBES clusters closest to it.
+    """
+
+    def __init__(self, post_ids: List[str], vectors: np.ndarray,
+                 embed_fn: Callable[..., np.ndarray] = hash_embed):
+        self.post_ids = post_ids
+        self.vectors = vectors
+        self.embed_fn = embed_fn
+        self.centroids = None
+        self.lists = None
+        if len(post_ids) > ANN_THRESHOLD:
+            self._build_ivf()
+
+    @classmethod
+    def from_documents(cls, docs: List[Dict[str, Any]],
+                       embed_fn: Callable[..., np.ndarray] = hash_embed) -> "PostIndex":
+        """Embed the captions and hashtags of ``docs`` and index them"""
+        post_ids = [doc.get("metadata", {}).get("post_id", "") for doc in docs]
+        texts = [_post_text(doc) for doc in docs]
+        hashtags = [doc.get("metadata", {}).get("hashtags") or [] for doc in docs]
+        vectors = embed_fn(texts, hashtags)
+        return cls(post_ids, vectors, embed_fn)
+
+    @classmethod
+    def from_posts(cls, posts: PostColumns,
+                   embed_fn: Callable[..., np.ndarray] = hash_embed) -> "PostIndex":
+        """Embed the captions and hashtags of compact posts and index them"""
+        texts = [
+            f"{caption} {' '.join(hashtags)} {TYPE_NAMES.get(code, '')}"
+            for caption, hashtags, code in zip(posts.captions, posts.hashtags, posts.type.tolist())
+        ]
+        vectors = embed_fn(texts, [list(hashtags) for hashtags in posts.hashtags])
+        return cls(list(posts.post_ids), vectors, embed_fn)
+
+    def _build_ivf(self):
+        n_clusters = max(1, int(np.sqrt(len(self.post_ids))))
+        rng = np.random.default_rng(0)
+        sample = self.vectors
+        if len(sample) > KMEANS_SAMPLE:
+            sample = sample[rng.choice(len(sample), KMEANS_SAMPLE, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), n_clusters, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(n_clusters):
+                members = sample[assignment == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    centroids[cluster] = centroid / norm if norm else centroid
+
+        assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignment == cluster) for cluster in range(n_clusters)]
+
+    def search(self, query: str, k: int = 20) -> List[int]:
+        """
+        Return positions of up to ``k`` posts similar to ``query``, best first.
+
+        Only posts sharing words or hashtags with the query are returned, so
+        the result is shorter than ``k`` (or empty) when few posts match.
+        """
+        if not self.post_ids or k <= 0:
+            return []
+        query_vector = self.embed_fn([query])[0]
+
+        if self.centroids is None:
+            candidates = np.arange(len(self.post_ids))
+        else:
+            probes = np.argsort(self.centroids @ query_vector)[::-1][:ANN_PROBES]
+            candidates = np.concatenate([self.lists[p] for p in probes])
+            if len(candidates) == 0:
+                candidates = np.arange(len(self.post_ids))
+
+        scores = self.vectors[candidates] @ query_vector
+        # Posts sharing no features with the query score 0 (or below, from hash
+        # collisions) and are not matches at all
+        matching = scores > 0
+        candidates, scores = candidates[matching], scores[matching]
+        k = min(k, len(candidates))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return candidates[top].tolist()
+
+
+class RetrievalIndex:
+    """Per-username PostIndex registry, persisted under a local directory"""
+
+    def __init__(self, root: str = "./live_data/vectors"):
+        self.root = root
+        self._indexes: Dict[str, PostIndex] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, username: str) -> str:
+        safe_name = re.sub(r'[^a-zA-Z0-9._]', '_', username.lower())
+        return os.path.join(self.root, f"{safe_name}.npz")
+
+    def build(self, username: str, posts: PostColumns) -> PostIndex:
+        """Embed ``posts`` for ``username`` (at ingest) and persist the vectors"""
+        index = PostIndex.from_posts(posts)
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            # Write aside and rename, so a concurrent reader never opens a half-written archive
+            path = self._path(username)
+            tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, vectors=index.vectors, post_ids=np.array(index.post_ids))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist vector index for {username}: {str(e)}")
+        with self._lock:
+            self._indexes[username] = index
+        logger.info(f"Indexed {len(posts)} posts for {username}")
+        return index
+
+    def get(self, username: str, posts: Optional[PostColumns] = None) -> Optional[PostIndex]:
+        """
+        Return the index for ``username``, loading it from disk if needed.
+
+        If ``posts`` is given and the stored index does not cover the same
+        posts, it is rebuilt from them.
+        """
+        with self._lock:
+            index = self._indexes.get(username)
+        if index is None:
+            try:
+                with np.load(self._path(username)) as stored:
+                    index = PostIndex(stored["post_ids"].tolist(), stored["vectors"])
+                with self._lock:
+                    self._indexes[username] = index
+            except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+                # Missing, or truncated by a crash mid-write; rebuilt below when posts are given
+                index = None
+
+        if posts is not None:
+            if index is None or set(index.post_ids) != set(posts.post_ids):
+                index = self.build(username, posts)
+        return index
+
+
+def select_relevant_posts(index: PostIndex, posts: PostColumns, query: str, k: int) -> List[int]:
+    """
+    Positions in ``posts`` of the ``k`` posts most relevant to ``query``, best first.
+
+    The embedding is lexical, so general questions ("How can I improve my
+    engagement?") often match few or no captions; the remaining slots go to
+    the most engaging posts, newest first among ties.
+    """
+    positions = posts.positions(index.post_ids[position] for position in index.search(query, k))
+    if len(positions) < k:
+        chosen = set(positions)
+        for position in np.argsort(-posts.engagement_total, kind="stable").tolist():
+            if len(positions) >= k:
+                break
+            if position not in chosen:
+                positions.append(position)
+    return positions
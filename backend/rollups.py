@@ -0,0 +1,181 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from enrichment import parse_timestamp
+from hashtag_index import ANALYTICS_PATH
+
+logger = logging.getLogger("instagram-api")
+
+GRANULARITIES = ("day", "week", "month")
+METRICS = ("posts", "likes", "comments", "views")
+
+
+def bucket_key(granularity: str, day: date) -> str:
+    """
+    Bucket a date falls in, formatted so buckets sort chronologically.
+
+    Weeks start on Sunday, matching date-fns ``startOfWeek`` in the dashboard.
+    """
+    if granularity == "day":
+        return day.isoformat()
+    if granularity == "week":
+        return (day - timedelta(days=(day.weekday() + 1) % 7)).isoformat()
+    if granularity == "month":
+        return day.strftime("%Y-%m")
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+class RollupStore:
+    """
+    Daily, weekly and monthly post counts and engagement sums per account and content type.
+
+    Each indexed post's day, type and metrics are remembered in
+    ``rollup_posts`` so a re-scraped post first takes back its previous
+    contribution; ``rollups`` then holds one row per (username, granularity,
+    bucket, type) and range queries read only the buckets asked for.
+    """
+
+    def __init__(self, path: str = ANALYTICS_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rollup_posts ("
+            "username TEXT NOT NULL, post_id TEXT NOT NULL, day TEXT NOT NULL, type TEXT NOT NULL, "
+            "likes INTEGER NOT NULL, comments INTEGER NOT NULL, views INTEGER NOT NULL, "
+            "PRIMARY KEY (username, post_id))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rollups ("
+            "username TEXT NOT NULL, granularity TEXT NOT NULL, bucket TEXT NOT NULL, type TEXT NOT NULL, "
+            "posts INTEGER NOT NULL, likes INTEGER NOT NULL, comments INTEGER NOT NULL, views INTEGER NOT NULL, "
+            "PRIMARY KEY (username, granularity, bucket, type))"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _add(conn: sqlite3.Connection, username: str, day: date, post_type: str,
+             posts: int, likes: int, comments: int, views: int):
+        for granularity in GRANULARITIES:
+            conn.execute(
+                "INSERT INTO rollups (username, granularity, bucket, type, posts, likes, comments, views) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (username, granularity, bucket, type) DO UPDATE SET "
+                "posts = posts + excluded.posts, likes = likes + excluded.likes, "
+                "comments = comments + excluded.comments, views = views + excluded.views",
+                (username, granularity, bucket_key(granularity, day), post_type, posts, likes, comments, views)
+            )
+
+    def update(self, username: str, docs: List[Dict[str, Any]]) -> int:
+        """
+        Fold posts into the rollups, replacing earlier versions of the same posts.
+
+        Args:
+            username: Account the posts belong to
+            docs: Documents with a ``metadata`` block as stored in AstraDB
+
+        Returns:
+            int: Number of posts applied
+        """
+        conn = self._connect()
+        applied = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for doc in docs:
+                metadata = doc.get("metadata", {})
+                post_id = metadata.get("post_id")
+                posted_at = parse_timestamp(metadata.get("timestamp"))
+                if not post_id or posted_at is None:
+                    continue
+
+                previous = conn.execute(
+                    "SELECT day, type, likes, comments, views FROM rollup_posts WHERE username = ? AND post_id = ?",
+                    (username, post_id)
+                ).fetchone()
+                if previous:
+                    old_day, old_type, old_likes, old_comments, old_views = previous
+                    self._add(conn, username, date.fromisoformat(old_day), old_type,
+                              -1, -old_likes, -old_comments, -old_views)
+
+                day = posted_at.date()
+                post_type = metadata.get("type") or "Other"
+                likes = int(metadata.get("likes") or 0)
+                comments = int(metadata.get("comments") or 0)
+                views = int(metadata.get("views") or 0)
+                conn.execute(
+                    "INSERT OR REPLACE INTO rollup_posts (username, post_id, day, type, likes, comments, views) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (username, post_id, day.isoformat(), post_type, likes, comments, views)
+                )
+                self._add(conn, username, day, post_type, 1, likes, comments, views)
+                applied += 1
+            conn.execute("DELETE FROM rollups WHERE posts <= 0")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return applied
+
+    def query(self, username: str, granularity: str, start: Optional[date] = None,
+              end: Optional[date] = None, post_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Buckets between ``start`` and ``end`` inclusive, oldest first.
+
+        Args:
+            username: Account to read
+            granularity: "day", "week" or "month"
+            start: First date of the range; None reads from the first bucket
+            end: Last date of the range; None reads to the last bucket
+            post_type: Restrict to one content type
+
+        Returns:
+            list: One dict per bucket with posts, likes, comments and views
+            totals and the same totals per content type under ``content_types``
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        sql = ("SELECT bucket, type, posts, likes, comments, views FROM rollups "
+               "WHERE username = ? AND granularity = ?")
+        params: List[Any] = [username, granularity]
+        if start is not None:
+            sql += " AND bucket >= ?"
+            params.append(bucket_key(granularity, start))
+        if end is not None:
+            sql += " AND bucket <= ?"
+            params.append(bucket_key(granularity, end))
+        if post_type is not None:
+            sql += " AND type = ?"
+            params.append(post_type)
+        sql += " ORDER BY bucket"
+
+        buckets: Dict[str, Dict[str, Any]] = {}
+        for bucket, row_type, *values in self._connect().execute(sql, params).fetchall():
+            entry = buckets.get(bucket)
+            if entry is None:
+                entry = buckets[bucket] = {"bucket": bucket, **{metric: 0 for metric in METRICS}, "content_types": {}}
+            for metric, value in zip(METRICS, values):
+                entry[metric] += value
+            entry["content_types"][row_type] = dict(zip(METRICS, values))
+        return list(buckets.values())
+
+
+def parse_range_date(value: Optional[str]) -> Optional[date]:
+    """Parse a YYYY-MM-DD range bound; raises ValueError on bad input"""
+    if value is None:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").date()
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+from timing import phase
+
+logger = logging.getLogger("instagram-api")
+
+CACHE_PATH = "./live_data/cache.sqlite3"
+
+
+def _like_prefix(prefix: str) -> str:
+    """LIKE pattern matching keys that start with ``prefix``, for use with ESCAPE '\\'"""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+class SharedCache:
+    """
+    Node-local cache shared by every worker process, backed by SQLite in WAL mode.
+
+    WAL lets any number of workers read while one writes, so a value computed
+    by one worker is served to all of them. Values are stored as orjson bytes.
+    Leases let workers agree on which of them computes a missing value, and
+    decaying scores let them share request-frequency counts.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, default_ttl: float = 300.0):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        # Computations in progress in this process, joined by concurrent callers
+        self._inflight: Dict[str, asyncio.Future] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "key TEXT PRIMARY KEY, score REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must not be shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_raw(self, key: str) -> Optional[bytes]:
+        """Return the stored bytes for ``key``, or None if missing or expired"""
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the decoded value for ``key``, or None if missing or expired"""
+        raw = self.get_raw(key)
+        return orjson.loads(raw) if raw is not None else None
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Look up several keys in one query, returning only the hits"""
+        if not keys:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        rows = self._connect().execute(
+            f"SELECT key, value FROM entries WHERE key IN ({placeholders}) AND expires_at > ?",
+            (*keys, time.time())
+        ).fetchall()
+        return {key: orjson.loads(value) for key, value in rows}
+
+    def set_raw(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """Store pre-encoded bytes under ``key``"""
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, expires_at)
+        )
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Encode and store ``value`` under ``key``"""
+        self.set_raw(key, orjson.dumps(value), ttl)
+
+    def delete_prefix(self, prefix: str):
+        """Remove every entry whose key starts with ``prefix``"""
+        self._connect().execute("DELETE FROM entries WHERE key LIKE ? ESCAPE '\\'", (_like_prefix(prefix),))
+
+    def purge_expired(self):
+        """Drop expired entries and leases"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+
+    def increment_score(self, key: str, half_life: float, amount: float = 1.0):
+        """Add ``amount`` to an exponentially decaying score, halving every ``half_life`` seconds"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT score, updated_at FROM scores WHERE key = ?", (key,)).fetchone()
+            score = amount
+            if row:
+                score += row[0] * math.pow(0.5, (now - row[1]) / half_life)
+            conn.execute(
+                "INSERT OR REPLACE INTO scores (key, score, updated_at) VALUES (?, ?, ?)",
+                (key, score, now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def top_scores(self, prefix: str, limit: int, half_life: float) -> List[Tuple[str, float]]:
+        """
+        Highest decayed scores among keys starting with ``prefix``.
+
+        Returns:
+            list: ``(key without prefix, current score)`` pairs, highest first
+        """
+        now = time.time()
+        rows = self._connect().execute(
+            "SELECT key, score, updated_at FROM scores WHERE key LIKE ? ESCAPE '\\'", (_like_prefix(prefix),)
+        ).fetchall()
+        scored = [
+            (key[len(prefix):], score * math.pow(0.5, (now - updated_at) / half_life))
+            for key, score, updated_at in rows
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def try_acquire(self, key: str, ttl: float) -> bool:
+        """Try to take the compute lease for ``key``; expired leases can be taken over"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE key = ?", (key,)).fetchone()
+            if row and row[0] != self.owner and row[1] > now:
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, self.owner, now + ttl)
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def renew(self, key: str, ttl: float) -> bool:
+        """Extend a lease held by this process by ``ttl`` seconds from now; False if it was lost"""
+        cursor = self._connect().execute(
+            "UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ?", (time.time() + ttl, key, self.owner)
+        )
+        return cursor.rowcount > 0
+
+    async def _keep_lease(self, key: str, ttl: float):
+        """Renew a lease every third of its TTL until cancelled, so long computations keep it"""
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                if not await asyncio.to_thread(self.renew, key, ttl):
+                    logger.warning(f"Lost the compute lease for {key}")
+                    return
+            except sqlite3.Error as e:
+                logger.warning(f"Renewing the compute lease for {key} failed: {str(e)}")
+
+    def release(self, key: str):
+        """Release a lease held by this process"""
+        self._connect().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             ttl: Optional[float] = None, lease_ttl: float = 300.0,
+                             poll_interval: float = 0.25) -> Any:
+        """
+        Return the cached value for ``key``, computing it at most once per node.
+
+        The worker that wins the lease runs ``compute`` and stores the result;
+        the others poll the cache until it appears. The lease is renewed while
+        ``compute`` runs, however long it takes; if the lease holder dies, its
+        lease expires within ``lease_ttl`` seconds and a waiting worker takes over. Concurrent callers
+        in the same process share a single computation, which keeps running
+        if one of them is cancelled.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._get_or_compute(key, compute, ttl, lease_ttl, poll_interval))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda done: self._finish_inflight(key, done))
+        return await asyncio.shield(inflight)
+
+    def _finish_inflight(self, key: str, future: asyncio.Future):
+        self._inflight.pop(key, None)
+        # Retrieve the outcome so a computation nobody waits for any more is not reported as unhandled
+        if not future.cancelled():
+            future.exception()
+
+    async def _get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                              ttl: Optional[float], lease_ttl: float, poll_interval: float) -> Any:
+        with phase("cache"):
+            value = await asyncio.to_thread(self.get, key)
+        if value is not None:
+            return value
+
+        lease_key = f"lease:{key}"
+        while True:
+            if await asyncio.to_thread(self.try_acquire, lease_key, lease_ttl):
+                try:
+                    # Another worker may have finished between our miss and the lease
+                    value = await asyncio.to_thread(self.get, key)
+                    if value is None:
+                        keeper = asyncio.create_task(self._keep_lease(lease_key, lease_ttl))
+                        try:
+                            value = await compute()
+                        finally:
+                            keeper.cancel()
+                        await asyncio.to_thread(self.set, key, value, ttl)
+                    return value
+                finally:
+                    await asyncio.to_thread(self.release, lease_key)
+
+            await asyncio.sleep(poll_interval)
+            value = await asyncio.to_thread(self.get, key)
+            if value is not None:
+                return value
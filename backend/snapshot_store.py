@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import re
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from enrichment import timestamp_to_epoch
+
+logger = logging.getLogger("instagram-api")
+
+SNAPSHOT_DIR = "./live_data/snapshots"
+MANIFEST_FILE = "manifest.json"
+STRINGS_FILE = "strings.json"
+# Bumped when the file layout changes; snapshots in another format are ignored
+SNAPSHOT_FORMAT = 2
+# Per-post text fields of PostColumns, stored together as JSON lists
+STRING_FIELDS = ("ids", "post_ids", "captions", "hashtags", "urls", "locations", "music", "extras")
+
+TYPE_CODES = {"Image": 0, "Reel": 1, "Carousel": 2}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+UNKNOWN_TYPE = -1
+
+class SnapshotError(Exception):
+    """Raised when a snapshot cannot be written or read"""
+    pass
+
+
+class SnapshotStore:
+    """
+    Local per-username snapshot of a user's posts, in PostColumns layout.
+
+    Each snapshot directory holds one ``.npy`` file per numeric column
+    (loaded back memory-mapped, so warm starts read straight from the page
+    cache without copying or parsing), the per-post text fields as JSON
+    lists, and a manifest that is written last so a half-written snapshot is
+    never picked up.
+    """
+
+    def __init__(self, root: str = SNAPSHOT_DIR, ttl_seconds: float = 6 * 3600):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+
+    def _user_dir(self, username: str) -> str:
+        safe_name = re.sub(r'[^a-zA-Z0-9._]', '_', username.lower())
+        return os.path.join(self.root, safe_name)
+
+    def _read_manifest(self, username: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._user_dir(username), MANIFEST_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return manifest if manifest.get("format") == SNAPSHOT_FORMAT else None
+
+    def fresh_version(self, username: str) -> Optional[float]:
+        """Write time of the snapshot if it is fresh, identifying its contents; None otherwise"""
+        manifest = self._read_manifest(username)
+        if manifest is None:
+            return None
+        written_at = manifest.get("written_at", 0)
+        return written_at if time.time() - written_at < self.ttl_seconds else None
+
+    def write(self, username: str, posts) -> float:
+        """Write a snapshot of ``posts`` (a PostColumns) for ``username``, returning its version"""
+        user_dir = self._user_dir(username)
+        try:
+            os.makedirs(user_dir, exist_ok=True)
+
+            # Remove the manifest first so readers treat the snapshot as absent
+            # while its files are being replaced
+            manifest_path = os.path.join(user_dir, MANIFEST_FILE)
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+
+            columns = posts.numeric_columns()
+            for name in columns:
+                values = getattr(posts, name)
+                self._atomic_write(os.path.join(user_dir, f"{name}.npy"), lambda f, v=values: np.save(f, v))
+
+            strings = orjson.dumps({field: getattr(posts, field) for field in STRING_FIELDS})
+            self._atomic_write(os.path.join(user_dir, STRINGS_FILE), lambda f: f.write(strings))
+
+            written_at = time.time()
+            manifest = json.dumps({
+                "format": SNAPSHOT_FORMAT, "username": username, "count": len(posts),
+                "columns": list(columns), "written_at": written_at
+            }).encode("utf-8")
+            self._atomic_write(manifest_path, lambda f: f.write(manifest))
+
+            logger.info(f"Wrote snapshot of {len(posts)} posts for {username}")
+            return written_at
+        except Exception as e:
+            logger.error(f"Snapshot write failed for {username}: {str(e)}")
+            raise SnapshotError(f"Snapshot write failed: {str(e)}")
+
+    @staticmethod
+    def _atomic_write(path: str, writer) -> None:
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            writer(f)
+        os.replace(tmp_path, path)
+
+    def load_columns(self, username: str) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, List[Any]]]]:
+        """
+        Load the snapshot of ``username`` for PostColumns.from_snapshot.
+
+        Returns:
+            tuple: Numeric columns as read-only memory maps and the text
+            fields as lists, or None if no complete snapshot exists
+        """
+        manifest = self._read_manifest(username)
+        if manifest is None:
+            return None
+        user_dir = self._user_dir(username)
+        try:
+            arrays = {
+                name: np.load(os.path.join(user_dir, f"{name}.npy"), mmap_mode="r")
+                for name in manifest["columns"]
+            }
+            with open(os.path.join(user_dir, STRINGS_FILE), "rb") as f:
+                strings = orjson.loads(f.read())
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Snapshot unreadable for {username}: {str(e)}")
+            return None
+        count = manifest["count"]
+        if any(len(values) != count for values in (*arrays.values(), *strings.values())):
+            logger.warning(f"Snapshot for {username} has inconsistent column lengths")
+            return None
+        return arrays, strings
+
+
+def columnar_from_columns(columns: Dict[str, np.ndarray], count: Optional[int] = None) -> Dict[str, Any]:
+    """Build a columnar response body straight from column arrays (see PostColumns.columns)"""
+    limit = len(columns["likes"]) if count is None else min(count, len(columns["likes"]))
+    return {
+        "format": "columnar",
+        "count": limit,
+        "columns": {
+            "timestamp": columns["timestamp"][:limit].tolist(),
+            "likes": columns["likes"][:limit].tolist(),
+            "comments": columns["comments"][:limit].tolist(),
+            "views": columns["views"][:limit].tolist(),
+            "type": [TYPE_NAMES.get(code, "") for code in columns["type"][:limit].tolist()],
+        }
+    }
+
+
+def columnar_from_documents(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a columnar response body from query results in a single pass.
+
+    Values are appended straight into per-column lists; no per-row output
+    objects are created.
+    """
+    timestamps, likes, comments, views, types = [], [], [], [], []
+    for doc in docs:
+        metadata = doc.get("metadata", {})
+        timestamps.append(timestamp_to_epoch(metadata.get("timestamp")))
+        likes.append(metadata.get("likes") or 0)
+        comments.append(metadata.get("comments") or 0)
+        views.append(metadata.get("views") or 0)
+        types.append(metadata.get("type", ""))
+    return {
+        "format": "columnar",
+        "count": len(docs),
+        "columns": {
+            "timestamp": timestamps,
+            "likes": likes,
+            "comments": comments,
+            "views": views,
+            "type": types,
+        }
+    }
+
+
+def summarize_columns(columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Compute per-type and overall engagement statistics from column arrays (see PostColumns.columns)"""
+    summary = {"posts": int(len(columns["likes"])), "by_type": {}}
+    if summary["posts"] == 0:
+        return summary
+
+    summary.update({
+        "total_likes": int(columns["likes"].sum()),
+        "total_comments": int(columns["comments"].sum()),
+        "total_views": int(columns["views"].sum()),
+        "avg_likes": float(columns["likes"].mean()),
+        "avg_comments": float(columns["comments"].mean()),
+    })
+    for code, name in TYPE_NAMES.items():
+        mask = columns["type"] == code
+        count = int(mask.sum())
+        if count:
+            summary["by_type"][name] = {
+                "posts": count,
+                "avg_likes": float(columns["likes"][mask].mean()),
+                "avg_comments": float(columns["comments"][mask].mean()),
+                "avg_views": float(columns["views"][mask].mean()),
+            }
+    return summary
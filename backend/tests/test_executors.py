@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+import pytest
+
+from executors import BoundedExecutor, ExecutorSaturatedError
+
+
+def test_cancelled_queued_call_releases_its_slot():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(block))
+        await asyncio.to_thread(started.wait, 5)
+        queued = asyncio.ensure_future(executor.run(lambda: "never runs"))
+        await asyncio.sleep(0)
+        assert executor.stats()["queued"] == 1
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert executor.stats()["queued"] == 0
+
+        # Both slots are usable again once the running call finishes
+        release.set()
+        await running
+        assert await executor.run(lambda: "ran") == "ran"
+        assert executor.is_idle()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_saturated_executor_sheds_calls():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.run(lambda: None)
+        release.set()
+        await running
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        executor.shutdown()
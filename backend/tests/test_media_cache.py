@@ -0,0 +1,184 @@
+import importlib
+import io
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from media_cache import MediaCache, MediaFetchError
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def make_jpeg(size=(1600, 1200)) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", size, (200, 60, 30)).save(output, format="JPEG")
+    return output.getvalue()
+
+
+class CDN:
+    """Local stand-in for the Instagram CDN, recording the paths requested"""
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        cdn = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                cdn.requests.append(self.path)
+                body = cdn.files.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+
+@pytest.fixture
+def cdn():
+    server = CDN()
+    server.thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+def test_fetch_downsizes(tmp_path, cdn):
+    cdn.files["/big.jpg"] = make_jpeg()
+    cache = MediaCache(str(tmp_path), thumbnail_size=(480, 480))
+
+    path = cache.fetch("post1", cdn.url("/big.jpg"))
+
+    with Image.open(path) as thumbnail:
+        assert thumbnail.size == (480, 360)
+    assert cache.get("post1") == path
+    # Already cached, so the CDN is not asked again
+    cache.fetch("post1", cdn.url("/big.jpg"))
+    assert cdn.requests == ["/big.jpg"]
+
+
+def test_evicts_least_recently_used_by_size(tmp_path, cdn):
+    cdn.files["/a.jpg"] = make_jpeg()
+    cache = MediaCache(str(tmp_path), thumbnail_size=(480, 480))
+    size = os.path.getsize(cache.fetch("a", cdn.url("/a.jpg")))
+    # Room for two thumbnails but not three
+    cache.max_bytes = 2 * size + size // 2
+
+    cache.fetch("b", cdn.url("/a.jpg"))
+    os.utime(cache.path_for("a"), (1, 1))
+    os.utime(cache.path_for("b"), (2, 2))
+    assert cache.get("a") is not None  # Reading "a" makes "b" the least recently used
+
+    cache.fetch("c", cdn.url("/a.jpg"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert sum(entry.stat().st_size for entry in os.scandir(tmp_path)) <= cache.max_bytes
+
+
+def test_rejects_invalid_post_ids(tmp_path, cdn):
+    cdn.files["/a.jpg"] = make_jpeg()
+    cache = MediaCache(str(tmp_path))
+
+    for post_id in ("../escape", "a/b", "a.jpg", "", "x" * 65):
+        with pytest.raises(ValueError):
+            cache.fetch(post_id, cdn.url("/a.jpg"))
+    assert cache.prefetch({"../escape": cdn.url("/a.jpg")}) == 0
+    assert cdn.requests == []
+
+
+def test_download_and_decode_errors(tmp_path, cdn):
+    cdn.files["/broken.jpg"] = b"not an image"
+    cache = MediaCache(str(tmp_path))
+
+    with pytest.raises(MediaFetchError):
+        cache.fetch("missing", cdn.url("/missing.jpg"))
+    with pytest.raises(MediaFetchError):
+        cache.fetch("broken", cdn.url("/broken.jpg"))
+    assert cache.get("missing") is None and cache.get("broken") is None
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    # The API keeps its singletons under ./live_data, so import it from a scratch directory
+    monkeypatch.chdir(tmp_path)
+    main = importlib.import_module("main")
+    from shared_cache import SharedCache
+
+    monkeypatch.setattr(main, "media_cache", MediaCache(str(tmp_path / "media")))
+    monkeypatch.setattr(main, "shared_cache", SharedCache(str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(main, "stored_posts", {}, raising=False)
+
+    class Collection:
+        def find_one(self, filter, projection=None):
+            urls = main.stored_posts.get(filter["metadata.post_id"])
+            return {"metadata": {"urls": urls}} if urls else None
+
+    async def get_collection(collection_name):
+        return Collection()
+
+    monkeypatch.setattr(main, "get_collection", get_collection)
+    return main
+
+
+def test_media_endpoint(api, cdn):
+    cdn.files["/p1.jpg"] = make_jpeg()
+    api.shared_cache.set("media-url:p1", cdn.url("/p1.jpg"))
+    client = TestClient(api.app)
+
+    response = client.get("/api/v1/media/p1")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["etag"] == '"p1"'
+    with Image.open(io.BytesIO(response.content)) as thumbnail:
+        assert max(thumbnail.size) <= 480
+
+    cached = client.get("/api/v1/media/p1", headers={"If-None-Match": '"p1"'})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == '"p1"'
+    assert cdn.requests == ["/p1.jpg"]
+
+
+def test_media_endpoint_rejects_unregistered_posts(api, cdn):
+    client = TestClient(api.app)
+
+    assert client.get("/api/v1/media/unknown").status_code == 404
+    assert client.get("/api/v1/media/bad.id").status_code == 400
+    assert cdn.requests == []
+
+
+def test_media_endpoint_looks_up_stored_posts(api, cdn):
+    # Posts ingested before their URL was registered are found in AstraDB
+    cdn.files["/stored.jpg"] = make_jpeg()
+    api.stored_posts["stored"] = [cdn.url("/stored.jpg")]
+
+    response = TestClient(api.app).get("/api/v1/media/stored")
+
+    assert response.status_code == 200
+    assert api.shared_cache.get("media-url:stored") == cdn.url("/stored.jpg")
+    assert cdn.requests == ["/stored.jpg"]
+
+
+def test_media_endpoint_reports_cdn_failures(api, cdn):
+    api.shared_cache.set("media-url:gone", cdn.url("/gone.jpg"))
+
+    response = TestClient(api.app).get("/api/v1/media/gone")
+
+    assert response.status_code == 502
+    assert cdn.requests == ["/gone.jpg"]
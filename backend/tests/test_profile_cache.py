@@ -0,0 +1,39 @@
+import pytest
+
+from profile_cache import NOT_FOUND, ProfileCache, ProfileUnavailableError
+from shared_cache import SharedCache
+
+instaloader = pytest.importorskip("instaloader")
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    return ProfileCache(SharedCache(str(tmp_path / "cache.sqlite3")))
+
+
+def fail_lookup(monkeypatch, message):
+    def from_username(context, username):
+        raise instaloader.exceptions.ProfileNotExistsException(message.format(username))
+
+    monkeypatch.setattr(instaloader.Profile, "from_username", staticmethod(from_username))
+
+
+def test_missing_profile_is_cached(profiles, monkeypatch):
+    fail_lookup(monkeypatch, "Profile {} does not exist.")
+
+    with pytest.raises(ProfileUnavailableError):
+        profiles.resolve(None, "gone")
+
+    assert profiles.get("gone") == {"status": NOT_FOUND}
+    with pytest.raises(ProfileUnavailableError):
+        profiles.check("gone")
+
+
+def test_profile_that_failed_to_load_is_not_cached(profiles, monkeypatch):
+    fail_lookup(monkeypatch, "Profile {} seems to exist, but could not be loaded.")
+
+    with pytest.raises(instaloader.exceptions.ProfileNotExistsException):
+        profiles.resolve(None, "flaky")
+
+    assert profiles.get("flaky") is None
+    profiles.check("flaky")
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from post_store import PostColumns
+from query_router import RoutedQuery, answer_query, route_query
+
+ROUTES = [
+    # Factual questions answered locally
+    ("What is the best time to post?", RoutedQuery("best_time")),
+    ("what are the best days to post", RoutedQuery("best_time")),
+    ("When should I post reels?", RoutedQuery("best_time", post_type="Reel")),
+    ("best time to post reels for more views", RoutedQuery("best_time", "views", "Reel")),
+    ("What's my most liked post?", RoutedQuery("top_post", "likes")),
+    ("Which post got the most comments?", RoutedQuery("top_post", "comments")),
+    ("top 10 posts by views", RoutedQuery("top_post", "views", limit=10)),
+    ("Show me my top 3 reels by views", RoutedQuery("top_post", "views", "Reel", 3)),
+    ("what are my top 500 posts", RoutedQuery("top_post", limit=50)),
+    ("What is my average likes per reel?", RoutedQuery("average", "likes", "Reel")),
+    ("average views per video", RoutedQuery("average", "views", "Reel")),
+    ("Which content type performs best?", RoutedQuery("best_content_type")),
+    ("Do reels or images perform better?", RoutedQuery("best_content_type")),
+    ("How often do I post reels?", RoutedQuery("posting_frequency", post_type="Reel")),
+    ("What is my posting frequency?", RoutedQuery("posting_frequency")),
+    ("What are my most used hashtags?", RoutedQuery("top_hashtags", "count")),
+    ("top 5 most used hashtags", RoutedQuery("top_hashtags", "count", limit=5)),
+    ("What are the top performing hashtags?", RoutedQuery("top_hashtags", "likes")),
+    ("Which hashtags get the most likes?", RoutedQuery("top_hashtags", "likes")),
+    # Questions that only contain a routable phrase go to the LLM
+    ("how many likes did my last post get?", None),
+    ("how many posts mention giveaways?", None),
+    ("When did I post my most liked reel?", None),
+    ("What are the top trends in my posts?", None),
+    ("best hashtags to use for reach", None),
+    ("What is the best time to post a giveaway?", None),
+    ("What are the top 0 posts?", None),
+    # Open-ended questions go to the LLM
+    ("Why are my reels doing worse?", None),
+    ("Suggest ideas for my next post", None),
+    ("How can I improve my engagement?", None),
+]
+
+
+@pytest.mark.parametrize("query,expected", ROUTES)
+def test_route_query(query, expected):
+    assert route_query(query) == expected
+
+
+def make_posts(count):
+    docs = [{
+        "_id": str(i),
+        "metadata": {
+            "post_id": f"p{i}",
+            "likes": i * 10,
+            "comments": i,
+            "views": 0,
+            "type": "Image",
+            "timestamp": f"2024-01-{i + 1:02d} 12:00:00",
+        },
+    } for i in range(count)]
+    return PostColumns.from_documents("someone", docs)
+
+
+def test_top_post_respects_limit():
+    posts = make_posts(20)
+    answer = answer_query(route_query("top 10 posts by likes"), posts)
+    likes = [post["likes"] for post in answer["data"]["posts"]]
+    assert likes == sorted(likes, reverse=True) and len(likes) == 10
+    assert likes[0] == int(np.max(posts.likes))
+
+
+def test_top_post_defaults_to_three():
+    answer = answer_query(route_query("What are my top posts?"), make_posts(20))
+    assert len(answer["data"]["posts"]) == 3
@@ -0,0 +1,48 @@
+from post_store import PostColumns
+from retrieval import PostIndex, select_relevant_posts
+
+
+def make_posts():
+    captions = [
+        "sunset over the beach",
+        "new recipe for pasta night",
+        "morning workout at the gym",
+        "pasta with fresh basil",
+        "city lights at night",
+    ]
+    docs = [{
+        "_id": str(i),
+        "metadata": {
+            "post_id": f"p{i}",
+            "caption": caption,
+            "likes": [10, 50, 500, 20, 300][i],
+            "comments": 1,
+            "timestamp": f"2024-01-{i + 1:02d} 12:00:00",
+        },
+    } for i, caption in enumerate(captions)]
+    return PostColumns.from_documents("someone", docs)
+
+
+def post_ids(posts, positions):
+    return [posts.post_ids[i] for i in positions]
+
+
+def test_matching_posts_come_first():
+    posts = make_posts()
+    index = PostIndex.from_posts(posts)
+
+    selected = post_ids(posts, select_relevant_posts(index, posts, "Which pasta posts did best?", 3))
+
+    assert set(selected[:2]) == {"p1", "p3"}
+    # The remaining slot goes to the most engaging other post
+    assert selected[2] == "p2"
+
+
+def test_question_without_matching_words_falls_back_to_engagement():
+    posts = make_posts()
+    index = PostIndex.from_posts(posts)
+
+    assert index.search("How can I improve my engagement?", 3) == []
+    selected = post_ids(posts, select_relevant_posts(index, posts, "How can I improve my engagement?", 3))
+
+    assert selected == ["p2", "p4", "p1"]
@@ -0,0 +1,161 @@
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger("instagram-api")
+
+
+class RequestTimings:
+    """Per-request accumulator of time spent in named phases"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, duration_ms: float):
+        # Phases can be recorded from executor threads as well as the event loop
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + duration_ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        with self._lock:
+            metrics = [f"{name};dur={duration:.1f}" for name, duration in self.phases.items()]
+        metrics.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(metrics)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_phase(name: str, duration_ms: float):
+    """Add time to a phase of the current request; a no-op outside a request"""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, duration_ms)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Time the enclosed block as phase ``name`` of the current request.
+
+    Works around ``await`` too, in which case it measures wall time including
+    any time the request spent waiting.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, (time.perf_counter() - start) * 1000)
+
+
+class StackSampler(threading.Thread):
+    """
+    Sampling profiler collecting the stacks of all threads at a fixed interval.
+
+    Work for a request runs on the event loop and on executor threads, so
+    every thread is sampled; stacks from concurrent requests are included.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.samples
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware adding a ``Server-Timing`` header with the request's phase breakdown.
+
+    Requests slower than ``slow_request_ms`` are logged with their breakdown.
+    A ``profile_sample_rate`` fraction of requests run under a StackSampler;
+    if such a request turns out slow, its samples are written in collapsed
+    stack format (one ``stack count`` per line, ready for flamegraph tools)
+    to ``profile_dir``.
+    """
+
+    def __init__(self, app, slow_request_ms: float = 1000.0, profile_sample_rate: float = 0.0,
+                 profile_dir: str = "./live_data/profiles", profile_interval: float = 0.005):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_dir = profile_dir
+        self.profile_interval = profile_interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        sampler = None
+        if self.profile_sample_rate and random.random() < self.profile_sample_rate:
+            sampler = StackSampler(self.profile_interval)
+            sampler.start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append("Server-Timing", timings.server_timing(timings.elapsed_ms()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_timings.reset(token)
+            total_ms = timings.elapsed_ms()
+            samples = sampler.stop() if sampler is not None else None
+            if total_ms >= self.slow_request_ms:
+                logger.warning(
+                    f"Slow request {scope.get('method')} {scope.get('path')} took {total_ms:.0f}ms: "
+                    f"{timings.server_timing(total_ms)}"
+                )
+                if samples:
+                    self._dump_profile(scope.get("path", ""), samples)
+
+    def _dump_profile(self, path: str, samples: Counter):
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = re.sub(r"[^a-zA-Z0-9]+", "_", path).strip("_") or "root"
+            filename = os.path.join(self.profile_dir, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{name}.folded")
+            with open(filename, "w", encoding="utf-8") as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            logger.info(f"Wrote profile of slow request to {filename}")
+        except OSError as e:
+            logger.error(f"Failed to write profile: {str(e)}")
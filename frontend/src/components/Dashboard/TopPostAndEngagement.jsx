@@ -4,6 +4,17 @@ import { Clock, TrendingUp, Activity, Heart, MessageCircle, Share2, Play } from
 import { Card, CardContent, CardHeader, CardTitle } from "../ui/card";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "../ui/tabs";
 
+// Derived features are computed once at ingest; posts stored before that fall back to the raw fields.
+// Hours are UTC, matching the insights answers, rather than the browser's local time.
+const engagementTotal = (post) =>
+  post.metadata.derived?.engagement_total ?? post.metadata.likes + post.metadata.comments;
+
+const postHour = (post) => {
+  const { derived, timestamp } = post.metadata;
+  if (derived) return derived.post_hour;
+  return timestamp ? new Date(timestamp.replace(' ', 'T') + 'Z').getUTCHours() : null;
+};
+
 const EngagementMetric = ({ icon: Icon, label, value, gradient }) => (
   <Card className={`bg-gradient-to-br ${gradient}`}>
     <CardContent className="pt-6">
@@ -75,8 +86,13 @@ const TopPost = ({ post, username }) => {
   const [mediaError, setMediaError] = useState(false);
   const [useProxy, setUseProxy] = useState(false);
 
-  const directImageUrl = post.metadata.urls[0] || "";
-  const proxiedImageUrl = `/api/image-proxy?imageUrl=${encodeURIComponent(directImageUrl)}`;
+  const cdnImageUrl = post.metadata.urls?.[0] || "";
+  const backendUrl = process.env.NEXT_PUBLIC_BACKEND_URL;
+  // Prefer the backend's cached thumbnail; fall back to the CDN URL via the proxy
+  const directImageUrl = backendUrl && post.metadata.post_id
+    ? `${backendUrl}/media/${encodeURIComponent(post.metadata.post_id)}`
+    : cdnImageUrl;
+  const proxiedImageUrl = `/api/image-proxy?imageUrl=${encodeURIComponent(cdnImageUrl)}`;
 
   useEffect(() => {
     const loadMedia = async () => {
@@ -190,13 +206,9 @@ const EngagementChart = ({ posts }) => {
   const [hoveredBar, setHoveredBar] = useState(null);
 
   const hourlyData = Array(24).fill(0).map((_, hour) => {
-    const postsAtHour = posts.filter(post => 
-      new Date(post.metadata.timestamp).getHours() === hour
-    );
+    const postsAtHour = posts.filter(post => postHour(post) === hour);
 
-    const totalEngagement = postsAtHour.reduce((sum, post) => 
-      sum + post.metadata.likes + post.metadata.comments, 0
-    );
+    const totalEngagement = postsAtHour.reduce((sum, post) => sum + engagementTotal(post), 0);
 
     const avgEngagement = postsAtHour.length > 0 
       ? totalEngagement / postsAtHour.length 
@@ -271,19 +283,13 @@ const Dashboard = ({ username, posts }) => {
     curr.metadata.likes > max.metadata.likes ? curr : max, posts[0]
   );
 
-  const totalEngagement = posts.reduce((sum, post) =>
-    sum + post.metadata.likes + post.metadata.comments, 0
-  );
+  const totalEngagement = posts.reduce((sum, post) => sum + engagementTotal(post), 0);
 
   const averageEngagement = totalEngagement / posts.length;
 
   const bestHour = Array(24).fill(0).reduce((best, _, hour) => {
-    const postsAtHour = posts.filter(post =>
-      new Date(post.metadata.timestamp).getHours() === hour
-    );
-    const engagementAtHour = postsAtHour.reduce((sum, post) =>
-      sum + post.metadata.likes + post.metadata.comments, 0
-    );
+    const postsAtHour = posts.filter(post => postHour(post) === hour);
+    const engagementAtHour = postsAtHour.reduce((sum, post) => sum + engagementTotal(post), 0);
     return engagementAtHour > best.engagement ? { hour, engagement: engagementAtHour } : best;
   }, { hour: 0, engagement: 0 }).hour;
 
@@ -314,7 +320,7 @@ const Dashboard = ({ username, posts }) => {
         <EngagementMetric
           icon={Activity}
           label="Peak Hour"
-          value={`${bestHour}:00`}
+          value={`${bestHour}:00 UTC`}
           gradient="from-violet-50 to-purple-50"
         />
         <EngagementMetric